@@ -0,0 +1,105 @@
+"""
+Requests per second and latency of the JSON scoring API, with keep-alive
+clients fetching random drivers one at a time and in batches.
+
+    python benchmarks/api_throughput.py --drivers 20000 --clients 8 --seconds 10 --workers 2
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from benchmarks.sqlite_profile import write_driver_data
+from database.db_manager import DatabaseManager
+
+def wait_until_ready(port, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/health')
+            ready = connection.getresponse().status == 200
+            connection.close()
+            if ready:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Scoring API did not start")
+
+def run_client(port, num_drivers, batch_size, seconds, seed):
+    """Issue requests over one keep-alive connection until the time is up, returning latencies"""
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if batch_size == 1:
+            connection.request('GET', f"/drivers/{rng.randint(1, num_drivers)}")
+        else:
+            body = json.dumps({'driver_ids': [rng.randint(1, num_drivers) for _ in range(batch_size)]})
+            connection.request('POST', '/drivers/scores', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        errors += response.status != 200
+    return latencies, errors
+
+def run_load(port, args, batch_size):
+    client_args = [(port, args.drivers, batch_size, args.seconds, seed) for seed in range(args.clients)]
+    with multiprocessing.Pool(args.clients) as pool:
+        results = pool.starmap(run_client, client_args)
+    latencies = np.concatenate([np.asarray(latency) for latency, _ in results]) * 1000
+    errors = sum(error for _, error in results)
+    requests = len(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    label = 'single driver' if batch_size == 1 else f"batches of {batch_size}"
+    print(f"  {label:>16}: {requests / args.seconds:8.0f} req/s  {requests * batch_size / args.seconds:9.0f} drivers/s"
+          f"  p50 {p50:6.2f}ms  p95 {p95:6.2f}ms  p99 {p99:6.2f}ms  errors {errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scoring API.")
+    parser.add_argument('--drivers', type=int, default=20000, help="Drivers in the data file")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent keep-alive clients")
+    parser.add_argument('--seconds', type=float, default=10, help="Duration per run")
+    parser.add_argument('--workers', type=int, default=1, help="API worker processes")
+    parser.add_argument('--batch-size', type=int, default=100, help="Drivers per batch request")
+    parser.add_argument('--port', type=int, default=8699, help="Port for the API under test")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / 'driver_data.csv'
+        write_driver_data(data_path, args.drivers)
+        db_url = f"sqlite:///{tmp}/api.db"
+        DatabaseManager(db_url, data_path=data_path, reload_interval=None).close()
+
+        server = subprocess.Popen([sys.executable, str(project_root / 'src' / 'scoring_api.py'), '--db-url', db_url,
+                                   '--port', str(args.port), '--workers', str(args.workers)],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            wait_until_ready(args.port)
+            print(f"{args.drivers} drivers, {args.clients} clients, {args.workers} API worker(s)")
+            # The first pass fills the cache; the second measures the steady state
+            for phase in ['cold cache', 'warm cache']:
+                print(phase)
+                run_load(args.port, args, 1)
+                run_load(args.port, args, args.batch_size)
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
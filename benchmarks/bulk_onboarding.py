@@ -0,0 +1,56 @@
+"""
+Fleet onboarding throughput: registering drivers one at a time versus in bulk.
+
+    python benchmarks/bulk_onboarding.py --drivers 100000 --single 2000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from database.db_manager import DatabaseManager
+from sqlite_profile import PASSWORD, write_driver_data
+
+def fleet_records(start, count):
+    return [(f"KA{i:08d}", f"DL{i:08d}", PASSWORD) for i in range(start, start + count)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk driver registration.")
+    parser.add_argument('--drivers', type=int, default=100000, help="Drivers to onboard in bulk")
+    parser.add_argument('--single', type=int, default=2000, help="Drivers to register one at a time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        data_path = workdir / 'driver_data.csv'
+        write_driver_data(data_path, args.drivers + args.single)
+        db = DatabaseManager(f"sqlite:///{workdir / 'portal.db'}", data_path=data_path)
+
+        start = time.perf_counter()
+        for plate, license_number, password in fleet_records(1, args.single):
+            db.register_driver(plate, license_number, password)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = db.register_drivers_bulk(fleet_records(args.single + 1, args.drivers))
+        bulk = time.perf_counter() - start
+
+        # Running the same batch again must reject every record
+        start = time.perf_counter()
+        repeated = db.register_drivers_bulk(fleet_records(args.single + 1, args.drivers))
+        rejected = time.perf_counter() - start
+        db.close()
+
+    print(f"one at a time  {args.single / single:10.0f} drivers/s")
+    print(f"bulk           {args.drivers / bulk:10.0f} drivers/s   "
+          f"({sum(r['success'] for r in results)} registered in {bulk:.2f}s)")
+    print(f"bulk, repeated {args.drivers / rejected:10.0f} drivers/s   "
+          f"({sum(not r['success'] for r in repeated)} rejected in {rejected:.2f}s)")
+
+if __name__ == "__main__":
+    main()
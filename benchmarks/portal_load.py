@@ -0,0 +1,359 @@
+"""
+Concurrent portal users walking login -> dashboard -> recommendations -> confirm
+against a seeded database, with latency percentiles per step and where each
+step's time goes: database, scoring, chart construction, and the rest.
+
+    python benchmarks/portal_load.py --drivers 20000 --users 16 --seconds 20
+    python benchmarks/portal_load.py --mode apptest --users 4 --seconds 30 --published-scores
+
+The direct mode makes the calls the pages make, without Streamlit; the apptest
+mode runs src/pages/login.py itself in a headless Streamlit session per user, so
+"other" there is the Streamlit runtime and the rest of the page, and "paused" the
+login page's pause on its success message. Times are wall clock: with more users
+than cores, waiting for the CPU is charged to whatever the user was doing, so
+run a single user to see what each step costs on its own.
+"""
+import argparse
+import functools
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from benchmarks.sqlite_profile import PASSWORD, seed_drivers, write_driver_data
+from database.db_manager import DEFAULT_DB_URL, DatabaseManager, get_db_manager
+
+LOGIN_PAGE = project_root / 'src' / 'pages' / 'login.py'
+STEPS = ['login', 'dashboard', 'recommendations', 'confirm']
+CATEGORIES = ['database', 'scoring', 'charts', 'paused']
+PIPELINE_STAGES = 'validate,features,risk,premiums,publish'
+# Session state entry that tells the profiler which user a script run belongs to
+SESSION_USER_KEY = '_load_test_user'
+
+_profiler = None
+
+class StepProfiler:
+    """
+    Wraps functions in place so every call adds its exclusive time (minus time in
+    nested wrapped calls) to a category of the step it belongs to: the calling
+    thread's current step or, for calls on another thread such as a Streamlit
+    script thread, the current step of the session that session_key() names.
+    """
+    def __init__(self, session_key=None):
+        self._local = threading.local()
+        self._session_key = session_key
+        self._sessions = {}
+        self._patched = []
+
+    def _current_times(self):
+        times = getattr(self._local, 'times', None)
+        if times is None and self._session_key is not None:
+            times = self._sessions.get(self._session_key())
+        return times
+
+    def instrument(self, owner, name, category):
+        original = getattr(owner, name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            times = self._current_times()
+            if times is None:
+                return original(*args, **kwargs)
+            stack = self._local.__dict__.setdefault('stack', [])
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                times[category] += elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+
+        setattr(owner, name, timed)
+        self._patched.append((owner, name, original))
+
+    def restore(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched.clear()
+
+    @contextmanager
+    def step(self, results, name, session=None):
+        """Time one step of a flow into results[name]: its latency and its time per category"""
+        times = defaultdict(float)
+        if session is None:
+            self._local.times = times
+        else:
+            self._sessions[session] = times
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if session is None:
+                self._local.times = None
+            else:
+                del self._sessions[session]
+            results[name]['latency'].append(elapsed)
+            for category, spent in times.items():
+                results[name][category] += spent
+
+def script_session():
+    """The load test user of the Streamlit script running on this thread, if any"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None or SESSION_USER_KEY not in ctx.session_state:
+        return None
+    return ctx.session_state[SESSION_USER_KEY]
+
+def render_chart(fig):
+    """What st.plotly_chart does with a figure before sending it to the browser"""
+    import plotly.io
+    return plotly.io.to_json(fig, validate=False)
+
+def instrument_portal(profiler, mode):
+    import src.model_recommendation as recommendation
+
+    for name in ['authenticate_driver', 'get_driver_details', 'get_peer_distributions', 'update_uib_model']:
+        profiler.instrument(DatabaseManager, name, 'database')
+    for name in ['calculate_risk_score', 'get_model_recommendation', 'model_suitability', 'estimate_monthly_premiums']:
+        profiler.instrument(recommendation, name, 'scoring')
+    for name in ['risk_gauge_figure', 'driving_patterns_figure', 'score_breakdown_figure',
+                 'model_suitability_figure', 'cost_benefit_figure']:
+        profiler.instrument(recommendation, name, 'charts')
+    if mode == 'apptest':
+        import streamlit
+        profiler.instrument(streamlit, 'plotly_chart', 'charts')
+        # The login page pauses on its success message before showing the dashboard
+        profiler.instrument(time, 'sleep', 'paused')
+    else:
+        profiler.instrument(sys.modules[__name__], 'render_chart', 'charts')
+
+def show_chart(chart, cache_key, build):
+    from src.figure_cache import figure_cache
+    render_chart(figure_cache.get_or_build((chart, *cache_key), build))
+
+def direct_section(info, scores, cache_key, section):
+    """The scoring and charts of one section of the recommendations page, returning the recommended model"""
+    import src.model_recommendation as recommendation
+
+    if scores:
+        risk_score = scores['behavior_risk_score']
+        recommended_model = scores['recommended_uib_model']
+    else:
+        risk_score = recommendation.calculate_risk_score(info)
+        recommended_model, _ = recommendation.get_model_recommendation(
+            risk_score, info['total_km'], info['driving_style'])
+    monthly_distance = info['total_km'] / 12
+
+    if section == "Profile & Risk":
+        show_chart('risk_gauge', cache_key, lambda: recommendation.risk_gauge_figure(risk_score))
+    elif section == "Score Analysis":
+        show_chart('score_breakdown', cache_key, lambda: recommendation.score_breakdown_figure(info))
+        show_chart('driving_patterns', cache_key, lambda: recommendation.driving_patterns_figure(info))
+    elif section == "Model Comparison":
+        show_chart('model_suitability', cache_key, lambda: recommendation.model_suitability_figure(
+            risk_score, monthly_distance, info['driving_style']))
+    else:
+        show_chart('cost_benefit', cache_key, lambda: recommendation.cost_benefit_figure(info, risk_score))
+    return recommended_model
+
+def direct_flow(profiler, results, driver_id):
+    """One user's visit through the calls the pages make, one database lookup per rerun as in the portal"""
+    import src.model_recommendation as recommendation
+    db = get_db_manager()
+
+    def details():
+        result = db.get_driver_details(driver_id)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        return result, (driver_id, result.get('data_version'))
+
+    with profiler.step(results, 'login'):
+        login = db.authenticate_driver(f"DL{int(driver_id):08d}", PASSWORD)
+        if not login['success']:
+            raise RuntimeError(login['error'])
+
+    with profiler.step(results, 'dashboard'):
+        result, cache_key = details()
+        info = result['additional_info']
+        show_chart('driving_patterns', cache_key, lambda: recommendation.driving_patterns_figure(info))
+
+    with profiler.step(results, 'recommendations'):
+        for section in recommendation.RECOMMENDATION_SECTIONS:
+            result, cache_key = details()
+            recommended_model = direct_section(result['additional_info'], result['scores'], cache_key, section)
+
+    with profiler.step(results, 'confirm'):
+        result, cache_key = details()
+        direct_section(result['additional_info'], result['scores'], cache_key, section)
+        update = db.update_uib_model(driver_id, recommended_model)
+        if not update['success']:
+            raise RuntimeError(update['error'])
+
+def apptest_flow(profiler, results, driver_id, user, timeout):
+    """One user's visit through the login page in a fresh headless Streamlit session"""
+    from streamlit.testing.v1 import AppTest
+    from src.model_recommendation import RECOMMENDATION_SECTIONS
+
+    def check(app):
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+
+    app = AppTest.from_file(str(LOGIN_PAGE), default_timeout=timeout)
+    app.session_state[SESSION_USER_KEY] = user
+    with profiler.step(results, 'login', user):
+        # Submitting the form reruns the page, which renders the dashboard
+        app.run()
+        app.text_input[0].input(f"DL{int(driver_id):08d}")
+        app.text_input[1].input(PASSWORD)
+        app.button[0].click()
+        app.run()
+        check(app)
+        if not app.session_state['logged_in']:
+            raise RuntimeError("Login failed")
+
+    with profiler.step(results, 'dashboard', user):
+        app.run()
+        check(app)
+
+    with profiler.step(results, 'recommendations', user):
+        app.sidebar.radio[0].set_value('Model Recommendations')
+        app.run()
+        for section in RECOMMENDATION_SECTIONS[1:]:
+            app.radio(key='recommendation_section').set_value(section)
+            app.run()
+        check(app)
+
+    with profiler.step(results, 'confirm', user):
+        next(button for button in app.button if button.label == "Confirm Model Selection").click()
+        app.run()
+        check(app)
+        if not any(message.value.startswith("Successfully enrolled") for message in app.success):
+            raise RuntimeError("Model selection was not confirmed")
+
+def simulate_user(user, args, seconds):
+    """Walk through the portal as drivers user+1, user+1+users, ... for the given time, returning the timings"""
+    results = {step: defaultdict(float, latency=[]) for step in STEPS}
+    results.update(flows=0, errors=0)
+    driver_ids = range(user + 1, args.drivers + 1, args.users)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        # Drivers are not reused while any are left, so their model is not yet locked
+        driver_id = str(driver_ids[results['flows'] % len(driver_ids)])
+        results['flows'] += 1
+        try:
+            if args.mode == 'apptest':
+                apptest_flow(_profiler, results, driver_id, user, args.timeout)
+            else:
+                direct_flow(_profiler, results, driver_id)
+        except Exception as e:
+            results['errors'] += 1
+            if results['errors'] == 1:
+                print(f"  user {user}: {e}")
+    return results
+
+def start_portal(args, data_path, pool_size):
+    """Open the shared database manager the pages use and instrument their calls, once per process"""
+    global _profiler
+    if args.mode == 'apptest':
+        from streamlit import config, logger
+        # Keep the pages' deprecation warnings out of the report
+        config.set_option('logger.level', 'error')
+        logger.set_log_level('error')
+    get_db_manager(DEFAULT_DB_URL, data_path=data_path, pool_size=pool_size, max_overflow=0, reload_interval=None)
+    _profiler = StepProfiler(script_session if args.mode == 'apptest' else None)
+    instrument_portal(_profiler, args.mode)
+
+def run_users(args, data_path):
+    """
+    Run every user at once. Direct users are threads sharing one portal process, like
+    Streamlit sessions; AppTest patches process-wide state on every run, so each
+    apptest user gets a process of its own.
+    """
+    if args.mode == 'apptest':
+        with multiprocessing.Pool(args.users, initializer=start_portal, initargs=(args, data_path, 2)) as pool:
+            return pool.starmap(simulate_user, [(user, args, args.seconds) for user in range(args.users)])
+
+    start_portal(args, data_path, args.users)
+    try:
+        with ThreadPoolExecutor(args.users) as executor:
+            users = [executor.submit(simulate_user, user, args, args.seconds) for user in range(args.users)]
+            return [user.result() for user in users]
+    finally:
+        # Flush buffered logins while the database is still in the working directory
+        get_db_manager().close()
+
+def seed_portal(args, workdir):
+    """Driver data file and portal database with every driver registered and, optionally, published scores"""
+    data_path = workdir / 'driver_data.csv'
+    write_driver_data(data_path, args.drivers)
+    db_url = f"sqlite:///{workdir / 'driver_portal.db'}"
+    db = DatabaseManager(db_url, data_path=data_path, reload_interval=None)
+    seed_drivers(db, args.drivers)
+    db.close()
+    if args.published_scores:
+        subprocess.run([sys.executable, str(project_root / 'src' / 'main.py'), '--source', 'file',
+                        '--input', str(data_path), '--data-dir', str(workdir / 'pipeline'),
+                        '--db-url', db_url, '--stages', PIPELINE_STAGES],
+                       stdout=subprocess.DEVNULL, check=True)
+    return data_path
+
+def report(users, args):
+    print(f"\n{args.mode} mode: {args.users} concurrent users, {args.drivers} drivers, "
+          f"{'published' if args.published_scores else 'computed'} scores")
+    flows = sum(user['flows'] for user in users)
+    errors = sum(user['errors'] for user in users)
+    print(f"{flows / args.seconds:.1f} flows/s, {flows} flows, {errors} errors")
+    header = ''.join(f"{category:>10}" for category in CATEGORIES + ['other'])
+    print(f"\n  {'step':<16}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}   mean ms per step in{header}")
+    for step in STEPS:
+        latencies = np.concatenate([np.asarray(user[step]['latency']) for user in users]) * 1000
+        if not len(latencies):
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        spent = [sum(user[step][category] for user in users) * 1000 / len(latencies) for category in CATEGORIES]
+        spent.append(latencies.mean() - sum(spent))
+        breakdown = ''.join(f"{ms:10.2f}" for ms in spent)
+        print(f"  {step:<16}{len(latencies):>7}{p50:8.2f}ms{p95:8.2f}ms{p99:8.2f}ms   {'':<19}{breakdown}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the driver portal with concurrent users.")
+    parser.add_argument('--mode', choices=['direct', 'apptest'], default='direct',
+                        help="Call the pages' functions directly, or run the login page in headless Streamlit")
+    parser.add_argument('--drivers', type=int, default=20000, help="Registered drivers")
+    parser.add_argument('--users', type=int, default=16, help="Concurrent simulated users")
+    parser.add_argument('--seconds', type=float, default=20, help="Duration of the run")
+    parser.add_argument('--published-scores', action='store_true',
+                        help="Run the pipeline first so the pages read published scores")
+    parser.add_argument('--timeout', type=float, default=60, help="Per-rerun timeout in apptest mode")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = seed_portal(args, Path(tmp))
+        # The pages open the default database URL, which is relative to the working directory
+        os.chdir(tmp)
+        try:
+            users = run_users(args, data_path)
+        finally:
+            os.chdir(cwd)
+
+    report(users, args)
+
+if __name__ == "__main__":
+    main()
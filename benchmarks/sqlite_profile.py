@@ -0,0 +1,115 @@
+"""
+Login and lookup throughput of the portal database under concurrent users,
+with SQLite's default settings versus the tuned profile (WAL + pragmas).
+
+    python benchmarks/sqlite_profile.py --drivers 20000 --users 32 --seconds 10
+"""
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from sqlalchemy import insert
+from database.db_manager import DatabaseManager, SQLITE_PRAGMAS
+from database.models import Driver
+
+PASSWORD = 'benchmark'
+SAMPLE_DATA = project_root / 'src' / 'data' / 'driver_data.csv'
+
+def write_driver_data(path, num_drivers):
+    """Driver data file of num_drivers rows, resampled from the sample data"""
+    sample = pd.read_csv(SAMPLE_DATA)
+    data = sample.sample(num_drivers, replace=True, random_state=42).reset_index(drop=True)
+    ids = np.arange(1, num_drivers + 1)
+    data['driver_id'] = ids
+    data['license_number'] = [f"DL{i:08d}" for i in ids]
+    data['license_plate'] = [f"KA{i:08d}" for i in ids]
+    data.to_csv(path, index=False)
+
+def seed_drivers(db, num_drivers):
+    """Register every driver in one transaction"""
+    password = db._hash_password(PASSWORD)
+    records = [
+        {'driver_id': str(i), 'license_plate': f"KA{i:08d}", 'license_number': f"DL{i:08d}", 'password': password}
+        for i in range(1, num_drivers + 1)
+    ]
+    with db.session_scope() as session:
+        session.execute(insert(Driver.__table__), records)
+
+def simulate_user(db, num_drivers, deadline, results, lock):
+    """Log in and load the dashboard as random drivers until the deadline"""
+    latencies = {'login': [], 'lookup': []}
+    errors = 0
+    while time.perf_counter() < deadline:
+        driver_id = random.randint(1, num_drivers)
+
+        start = time.perf_counter()
+        login = db.authenticate_driver(f"DL{driver_id:08d}", PASSWORD)
+        latencies['login'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        details = db.get_driver_details(str(driver_id))
+        latencies['lookup'].append(time.perf_counter() - start)
+
+        errors += (not login['success']) + (not details['success'])
+
+    with lock:
+        for step, values in latencies.items():
+            results[step].extend(values)
+        results['errors'] += errors
+
+def run_profile(name, pragmas, args, data_path, workdir):
+    db_url = f"sqlite:///{workdir / f'{name}.db'}"
+    db = DatabaseManager(db_url, data_path=data_path, pool_size=args.users, max_overflow=0,
+                         sqlite_pragmas=pragmas)
+    seed_drivers(db, args.drivers)
+
+    results = {'login': [], 'lookup': [], 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    users = [
+        threading.Thread(target=simulate_user, args=(db, args.drivers, deadline, results, lock))
+        for _ in range(args.users)
+    ]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    db.close()
+
+    print(f"\n{name} profile ({args.users} concurrent users, {args.seconds}s):")
+    for step in ['login', 'lookup']:
+        latencies = np.array(results[step]) * 1000
+        print(f"  {step:<7} {len(latencies) / args.seconds:8.0f} ops/s   "
+              f"p50 {np.percentile(latencies, 50):6.2f} ms   p95 {np.percentile(latencies, 95):6.2f} ms   "
+              f"p99 {np.percentile(latencies, 99):6.2f} ms")
+    print(f"  errors  {results['errors']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark portal database throughput.")
+    parser.add_argument('--drivers', type=int, default=20000, help="Registered drivers")
+    parser.add_argument('--users', type=int, default=32, help="Concurrent simulated users")
+    parser.add_argument('--seconds', type=float, default=10, help="Duration per profile")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        data_path = workdir / 'driver_data.csv'
+        write_driver_data(data_path, args.drivers)
+
+        # SQLite defaults: rollback journal, fsync on every commit, 5s busy timeout
+        run_profile('default', None, args, data_path, workdir)
+        run_profile('tuned', SQLITE_PRAGMAS, args, data_path, workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start cost of the portal: what importing the login page pulls in (from
+python -X importtime), and how long a fresh process takes to render the login
+form and to finish warming up the database and dashboard modules.
+
+    python benchmarks/startup_profile.py --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+LOGIN_PAGE = project_root / 'src' / 'pages' / 'login.py'
+
+# Imported by the Streamlit runtime before any page runs, so not charged to the portal
+RUNTIME_MODULES = ['streamlit']
+
+FIRST_RENDER = f"""
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file({str(LOGIN_PAGE)!r}, default_timeout=300)
+app.run()
+rendered = time.perf_counter() - start
+import src.pages.login as login
+login.start_warm_up().join()
+warm = time.perf_counter() - start
+print(rendered, warm, len(app.exception))
+"""
+
+def import_profile(module, workdir):
+    """Per-module import times (self, cumulative, depth) from python -X importtime"""
+    preload = ''.join(f"import {name}; " for name in RUNTIME_MODULES)
+    code = f"import sys; sys.path.insert(0, {str(project_root)!r}); {preload}import sys as _; _.stderr.write('--- portal\\n'); import {module}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=workdir, check=True)
+    lines = result.stderr.split('--- portal\n', 1)[1].splitlines()
+
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile portal startup.")
+    parser.add_argument('--top', type=int, default=15, help="Slowest imports to list")
+    parser.add_argument('--module', default='src.pages.login', help="Module whose import is profiled")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modules = import_profile(args.module, tmp)
+        total = sum(cumulative for _, _, cumulative, depth in modules if depth == 0)
+        # The profiled module and its parent packages would just repeat the total
+        parents = {'.'.join(args.module.split('.')[:i]) for i in range(1, args.module.count('.') + 2)}
+        dependencies = [module for module in modules if module[0] not in parents]
+
+        print(f"Importing {args.module} (after {', '.join(RUNTIME_MODULES)}): {total:.0f} ms")
+        print(f"\n  {'cumulative':>10}  {'self':>8}  module")
+        for name, self_ms, cumulative_ms, _ in sorted(dependencies, key=lambda m: -m[2])[:args.top]:
+            print(f"  {cumulative_ms:8.1f}ms  {self_ms:6.1f}ms  {name}")
+
+        env = {**os.environ, 'PYTHONPATH': str(project_root)}
+        result = subprocess.run([sys.executable, '-c', FIRST_RENDER], capture_output=True, text=True,
+                                cwd=tmp, env=env, check=True)
+        rendered, warm, errors = result.stdout.split()[-3:]
+        print(f"\nLogin form rendered in a fresh process: {float(rendered) * 1000:.0f} ms"
+              f"{'' if errors == '0' else f' ({errors} exceptions)'}")
+        print(f"Database and dashboard modules ready:   {float(warm) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from sqlalchemy import Integer, String, case, cast, delete, exists, func, insert, select
+from .models import DataVersion, Driver, DriverScore, FleetCubeCell
+from contextlib import contextmanager
+from datetime import datetime
+
+FLEET_CUBE_DIMENSIONS = ['risk_category', 'selected_uib_model', 'vehicle_type', 'driving_style']
+FLEET_CUBE_MEASURES = [column.name for column in FleetCubeCell.__table__.columns
+                       if column.name not in FLEET_CUBE_DIMENSIONS]
+# Cell label of drivers without a selected model, or without a portal account yet
+NO_MODEL = ''
+# Measures counting the drivers recommended each UIB model, in UIB_MODELS order
+RECOMMENDATION_MEASURES = ['payd_recommended', 'phyd_recommended', 'mhyd_recommended']
+
+def _cube_query(source, where=None, sign=1):
+    """Cube cells of the scored drivers in source, with every measure multiplied by sign"""
+    # Imported here so that importing the database layer does not load NumPy
+    from src.functionalities.scoring import UIB_MODELS
+    scores, drivers = DriverScore.__table__, Driver.__table__
+    dimensions = [
+        func.coalesce(scores.c.risk_category, ''),
+        func.coalesce(drivers.c.selected_uib_model, NO_MODEL),
+        func.coalesce(scores.c.vehicle_type, ''),
+        func.coalesce(scores.c.driving_style, '')
+    ]
+    values = [
+        scores.c.comprehensive_risk_score, scores.c.behavior_risk_score, scores.c.previous_accidents,
+        scores.c.monthly_km, scores.c.payd_premium, scores.c.phyd_premium,
+        func.abs(scores.c.payd_premium - scores.c.phyd_premium),
+        *[case((scores.c.recommended_uib_model == model, 1), else_=0) for model in UIB_MODELS]
+    ]
+    counts = [func.count(), func.count(scores.c.comprehensive_risk_score)]
+    measures = [count * sign for count in counts] + [func.coalesce(func.sum(value), 0) * sign for value in values]
+    query = select(*dimensions, *measures).select_from(source)
+    if where is not None:
+        query = query.where(where)
+    return query.group_by(*dimensions)
+
+def _fill_fleet_cube(connection):
+    """Replace every cell with a fresh aggregate of the published scores"""
+    scores, drivers = DriverScore.__table__, Driver.__table__
+    table = FleetCubeCell.__table__
+    # Scored drivers without an account are counted too, as not having chosen a model
+    source = scores.outerjoin(drivers, drivers.c.driver_id == cast(scores.c.driver_id, String))
+    connection.execute(delete(table))
+    connection.execute(insert(table).from_select(FLEET_CUBE_DIMENSIONS + FLEET_CUBE_MEASURES, _cube_query(source)))
+
+def rebuild_fleet_cube(connection, version):
+    """Aggregate the published scores into the fleet cube, marking it as built from version"""
+    _fill_fleet_cube(connection)
+    versions = DataVersion.__table__
+    connection.execute(delete(versions).where(versions.c.name == FleetCubeCell.__tablename__))
+    connection.execute(insert(versions), {'name': FleetCubeCell.__tablename__, 'version': version,
+                                          'updated_at': datetime.utcnow()})
+
+def _dialect_insert(connection):
+    """The dialect's INSERT with ON CONFLICT support, where the database has one"""
+    if connection.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+def _shift_statement(dialect_insert, driver_ids, sign):
+    """Add (sign 1) or remove (sign -1) the given drivers' contributions, if the cube has been built"""
+    scores, drivers = DriverScore.__table__, Driver.__table__
+    table = FleetCubeCell.__table__
+    source = drivers.join(scores, scores.c.driver_id == cast(drivers.c.driver_id, Integer))
+    built = exists().where(DataVersion.__table__.c.name == FleetCubeCell.__tablename__)
+    query = _cube_query(source, drivers.c.driver_id.in_(driver_ids) & built, sign)
+    statement = dialect_insert(table).from_select(FLEET_CUBE_DIMENSIONS + FLEET_CUBE_MEASURES, query)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[name] for name in FLEET_CUBE_DIMENSIONS],
+        set_={name: table.c[name] + statement.excluded[name] for name in FLEET_CUBE_MEASURES}
+    )
+
+@contextmanager
+def fleet_cube_moves(connection, driver_ids, batch_size):
+    """
+    Keep the fleet cube current around a block that moves the given drivers
+    between cells, such as switching their selected UIB model, in the caller's
+    transaction: the drivers leave their cells before the block and are added
+    to their new ones after it, so only the touched cells change. Both steps
+    are INSERT ... SELECT upserts, which makes the first statement of the
+    transaction a write rather than a read that SQLite would later have to upgrade.
+    """
+    dialect_insert = _dialect_insert(connection)
+    if dialect_insert is None:
+        yield
+        built = connection.execute(
+            select(DataVersion.__table__.c.name).where(DataVersion.__table__.c.name == FleetCubeCell.__tablename__)
+        ).first()
+        if built is not None:
+            _fill_fleet_cube(connection)
+        return
+
+    driver_ids = [str(driver_id) for driver_id in driver_ids]
+    batches = [driver_ids[start:start + batch_size] for start in range(0, len(driver_ids), batch_size)]
+    for batch in batches:
+        connection.execute(_shift_statement(dialect_insert, batch, -1))
+    yield
+    for batch in batches:
+        connection.execute(_shift_statement(dialect_insert, batch, 1))
+    table = FleetCubeCell.__table__
+    connection.execute(delete(table).where(table.c.driver_count <= 0))
@@ -0,0 +1,29 @@
+from sqlalchemy import select
+from .models import DriverMetrics
+
+CAMPAIGN_BATCH_SIZE = 100000
+# Columns of driver_metrics the campaign is scored from
+CAMPAIGN_SOURCE_COLUMNS = ['driver_id', 'vehicle_type', 'driving_style', 'total_km', 'behavior_risk_score']
+
+def iter_campaign_inputs(engine, batch_size=CAMPAIGN_BATCH_SIZE):
+    """
+    Stream the scoring inputs of every driver in the data file, batch_size drivers
+    at a time, as a dict of column tuples.
+
+    One query is read through a plain DBAPI cursor with fetchmany, so the whole
+    book comes from a single consistent snapshot without building a result row
+    object per driver, and only one batch is held in memory.
+    """
+    table = DriverMetrics.__table__
+    query = select(*[table.c[name] for name in CAMPAIGN_SOURCE_COLUMNS]).order_by(table.c.driver_id)
+    with engine.connect() as connection:
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(str(query.compile(dialect=engine.dialect)))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield dict(zip(CAMPAIGN_SOURCE_COLUMNS, zip(*rows)))
+        finally:
+            cursor.close()
@@ -0,0 +1,47 @@
+from pathlib import Path
+import threading
+
+def file_version(path):
+    """Version stamp of a data file from its size and modification time"""
+    stat = Path(path).stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+class DriverDataReloader:
+    """Background watcher that reloads the driver data file once a change to it has settled"""
+
+    def __init__(self, path, reload, interval=30.0):
+        self.path = path
+        self.reload = reload
+        self.interval = interval
+        self._seen = None
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='driver-data-reloader', daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Check the file now instead of waiting for the next interval"""
+        self._wake.set()
+
+    def check(self):
+        """Reload if the file is unchanged since the previous check, so half-written files are skipped"""
+        try:
+            version = file_version(self.path)
+        except OSError:
+            return False
+        settled = version == self._seen
+        self._seen = version
+        return self.reload() if settled else False
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self.check()
+
+    def close(self):
+        """Stop watching; a reload in progress is allowed to finish"""
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
@@ -1,132 +1,631 @@
-from sqlalchemy import create_engine
+from sqlalchemy import (MetaData, String, bindparam, cast, create_engine, delete, event, insert, inspect, or_,
+                        select, text, tuple_, update)
 from sqlalchemy.orm import sessionmaker
-from .models import Base, Driver
+from sqlalchemy.pool import StaticPool
+from .models import Base, Driver, DriverMetrics, DriverScore, DataVersion, FleetCubeCell, PeerDistribution
+from .analytics import fleet_cube_moves
+from .login_buffer import LastLoginBuffer
+from .data_reloader import DriverDataReloader, file_version
+from contextlib import contextmanager
+from pathlib import Path
+import atexit
 import hashlib
-import pandas as pd
+import threading
 from datetime import datetime, timedelta
+# pandas and the feature pipeline are imported where data is loaded, so logins and
+# lookups (and portal startup when the data is unchanged) never pay for them
+
+DEFAULT_DB_URL = 'sqlite:///driver_portal.db'
+DEFAULT_DRIVER_DATA_PATH = Path(__file__).parent.parent / 'src' / 'data' / 'driver_data.csv'
+
+# Tuned SQLite profile: WAL lets readers and the writer proceed concurrently,
+# synchronous=NORMAL skips the fsync per commit (safe with WAL), and the busy
+# timeout makes contended writers wait instead of failing with "database is locked"
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,        # milliseconds
+    'cache_size': -65536,        # 64 MB page cache per connection
+    'mmap_size': 268435456,      # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON'
+}
+
+METRIC_COLUMNS = [column.name for column in DriverMetrics.__table__.columns]
+SCORE_FIELDS = [column.name for column in DriverScore.__table__.columns if column.name != 'driver_id']
+IMPORT_BATCH_SIZE = 50000
+LOOKUP_BATCH_SIZE = 10000  # Keys per IN (...) query, below SQLite's bound-parameter limit
+DERIVED_TABLES = [DriverMetrics.__table__, DriverScore.__table__, PeerDistribution.__table__, FleetCubeCell.__table__]
+FLEET_PAGE_SIZE = 50
+
+# Unindexed copy of driver_metrics that a reload fills before it is swapped in
+_METRICS_STAGING = DriverMetrics.__table__.to_metadata(MetaData(), name='driver_metrics_next')
+_METRICS_STAGING.indexes.clear()
+# Index names share a namespace with the live table's, so each reload builds the
+# staging indexes under whichever of the two names the live table is not using
+_SWAP_SUFFIX = '_swap'
+
+_shared_managers = {}
+_shared_lock = threading.Lock()
+
+def get_db_manager(db_url=DEFAULT_DB_URL, **kwargs):
+    """Process-wide DatabaseManager for db_url, created and initialized once"""
+    manager = _shared_managers.get(db_url)
+    if manager is None:
+        with _shared_lock:
+            manager = _shared_managers.get(db_url)
+            if manager is None:
+                manager = DatabaseManager(db_url, **kwargs)
+                _shared_managers[db_url] = manager
+    return manager
+
+def _column_values(series):
+    """Plain Python values of a column for executemany, with missing values as None"""
+    import pandas as pd
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_integer_dtype(series.dtype):
+        values = series.to_numpy(dtype='int64', na_value=0).tolist()
+    elif series.dtype == 'float32':
+        # Via the shortest decimal form, so 0.2 is stored as 0.2 and not 0.20000000298
+        values = series.to_numpy(na_value=float('nan')).astype(str).astype('float64').tolist()
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy(dtype='float64', na_value=float('nan')).tolist()
+    else:
+        values = series.astype(object).tolist()
+    if missing.any():
+        values = [None if is_missing else value for value, is_missing in zip(values, missing)]
+    return values
+
+def _or_nan(value):
+    """Missing telemetry is NaN in the portal, as it was in the CSV"""
+    return float('nan') if value is None else value
+
+def ensure_schema(engine):
+    """Create missing tables, and indexes added to tables that already exist"""
+    # Tables derived from the data file and the pipeline are rebuilt rather than
+    # migrated; dropping their version stamp makes the next load or publish refill them
+    with engine.begin() as connection:
+        # Inspected through the same connection, so a pool of one does not deadlock
+        existing = inspect(connection)
+        for table in DERIVED_TABLES:
+            if not existing.has_table(table.name):
+                continue
+            columns = {column['name'] for column in existing.get_columns(table.name)}
+            if columns != {column.name for column in table.columns}:
+                table.drop(connection)
+                if existing.has_table(DataVersion.__tablename__):
+                    connection.execute(delete(DataVersion.__table__).where(DataVersion.__table__.c.name == table.name))
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        existing = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            present = {index['name'] for index in existing.get_indexes(table.name)}
+            for index in table.indexes:
+                if not present & {index.name, index.name + _SWAP_SUFFIX}:
+                    index.create(connection)
+
+def _score_values(score):
+    """Materialized pipeline scores of a driver as a plain dict, or None if not scored yet"""
+    if score is None:
+        return None
+    return {field: getattr(score, field) for field in SCORE_FIELDS}
+
+def _driver_info(metrics):
+    """Portal view of a driver's indexed metrics row"""
+    return {
+        "age": metrics.age,
+        "driving_style": metrics.driving_style,
+        "vehicle_type": metrics.vehicle_type,
+        "years_of_experience": metrics.years_of_experience,
+        "total_km": metrics.total_km,
+        "sudden_braking_events": _or_nan(metrics.sudden_braking_events),
+        "speeding_events": _or_nan(metrics.speeding_events),
+        "previous_accidents": metrics.previous_accidents,
+        "traffic_fines": metrics.traffic_fines,
+        "behavior_risk_score": metrics.behavior_risk_score
+    }
+
+def _apply_sqlite_pragmas(engine, pragmas):
+    """Set the pragmas on every new SQLite connection"""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_portal_engine(db_url, pool_size=10, max_overflow=20, pool_timeout=30, sqlite_pragmas=SQLITE_PRAGMAS):
+    """Engine with a connection pool sized for concurrent portal users"""
+    if db_url.startswith('sqlite'):
+        connect_args = {'check_same_thread': False}
+        if db_url in ('sqlite://', 'sqlite:///:memory:'):
+            # A single shared connection keeps the in-memory database alive
+            return create_engine(db_url, connect_args=connect_args, poolclass=StaticPool)
+        busy_timeout = (sqlite_pragmas or {}).get('busy_timeout')
+        if busy_timeout is not None:
+            connect_args['timeout'] = busy_timeout / 1000
+        engine = create_engine(db_url, connect_args=connect_args, pool_size=pool_size,
+                               max_overflow=max_overflow, pool_timeout=pool_timeout)
+        if sqlite_pragmas:
+            _apply_sqlite_pragmas(engine, sqlite_pragmas)
+        return engine
+    return create_engine(db_url, pool_size=pool_size, max_overflow=max_overflow,
+                         pool_timeout=pool_timeout, pool_pre_ping=True)
 
 class DatabaseManager:
-    def __init__(self, db_url='sqlite:///driver_portal.db'):
-        self.engine = create_engine(db_url)
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
-        self._load_driver_data()
-    
-    def _load_driver_data(self):
+    def __init__(self, db_url=DEFAULT_DB_URL, data_path=DEFAULT_DRIVER_DATA_PATH, pool_size=10, max_overflow=20,
+                 sqlite_pragmas=SQLITE_PRAGMAS, login_flush_interval=5.0, login_flush_size=1000,
+                 reload_interval=30.0):
+        self.engine = create_portal_engine(db_url, pool_size=pool_size, max_overflow=max_overflow,
+                                           sqlite_pragmas=sqlite_pragmas)
+        ensure_schema(self.engine)
+        # Loaded objects stay readable after their session closes
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+        # Login timestamps are written behind, in batches, so logins stay read-only
+        self.login_buffer = LastLoginBuffer(self.engine, login_flush_interval, login_flush_size)
+        atexit.register(self.login_buffer.close)
+        self.data_path = data_path
+        self._reload_lock = threading.Lock()
+        if self.driver_data_version() is None:
+            # Nothing to serve yet, so load before accepting requests
+            self.reload_driver_data()
+        # Later changes to the data file are picked up in the background, without a restart
+        self.reloader = None
+        if reload_interval:
+            self.reloader = DriverDataReloader(self.data_path, self.reload_driver_data, reload_interval)
+    
+    def close(self):
+        """Stop watching the data file, flush buffered writes and release pooled connections"""
+        if self.reloader is not None:
+            self.reloader.close()
+        self.login_buffer.close()
+        self.engine.dispose()
+    
+    @contextmanager
+    def session_scope(self):
+        """A short-lived session per request, committed on success and rolled back on error"""
+        session = self.Session()
         try:
-            self.driver_data = pd.read_csv('src/data/driver_data.csv')
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def driver_data_version(self):
+        """Version stamp of the driver data currently served, or None before the first import"""
+        with self.session_scope() as session:
+            current = session.get(DataVersion, 'driver_metrics')
+            return current.version if current is not None else None
+    
+    def scoring_data_version(self):
+        """Combined version of the driver metrics and the published scores, changing whenever either is refreshed"""
+        with self.session_scope() as session:
+            versions = dict(session.query(DataVersion.name, DataVersion.version)
+                            .filter(DataVersion.name.in_(['driver_metrics', 'driver_scores'])))
+        return f"{versions.get('driver_metrics', '')}:{versions.get('driver_scores', '')}"
+    
+    def reload_driver_data(self):
+        """Import the driver data file into the indexed metrics table if it has changed, returning True if it did"""
+        if not self._reload_lock.acquire(blocking=False):
+            # Another thread is already reloading
+            return False
+        try:
+            version = file_version(self.data_path)
+            if version == self.driver_data_version():
+                return False
+            
+            import pandas as pd
+            from src.functionalities.feature_store import FeatureStore
+            from src.functionalities.validation import validate_driver_data
+            
+            raw_data = pd.read_csv(self.data_path)
+            if file_version(self.data_path) != version:
+                # Still being written; the next check will pick up the finished file
+                return False
+            driver_data, rejected = validate_driver_data(raw_data)
+            if len(rejected):
+                print(f"Skipped {len(rejected)} invalid driver records")
+            self.import_driver_metrics(FeatureStore(driver_data).join(), version)
+            return True
         except Exception as e:
             print(f"Error loading driver data: {e}")
-            self.driver_data = None
+            return False
+        finally:
+            self._reload_lock.release()
+    
+    def import_driver_metrics(self, driver_data, version):
+        """Load driver_data into a staging table, then atomically swap it in for the metrics table"""
+        columns = [_column_values(driver_data[column]) for column in METRIC_COLUMNS]
+        records = [dict(zip(METRIC_COLUMNS, row)) for row in zip(*columns)]
+        
+        # Fill the staging copy in batches, so the portal keeps serving and writing meanwhile
+        with self.engine.begin() as connection:
+            _METRICS_STAGING.drop(connection, checkfirst=True)
+            _METRICS_STAGING.create(connection)
+        for start in range(0, len(records), IMPORT_BATCH_SIZE):
+            with self.engine.begin() as connection:
+                # Core executemany, without per-object ORM bookkeeping
+                connection.execute(insert(_METRICS_STAGING), records[start:start + IMPORT_BATCH_SIZE])
+        
+        # Indexes are built before the swap too, so the swap never waits on them
+        with self.engine.begin() as connection:
+            live = {index['name'] for index in inspect(connection).get_indexes(DriverMetrics.__tablename__)}
+            for index in DriverMetrics.__table__.indexes:
+                name = index.name + _SWAP_SUFFIX if index.name in live else index.name
+                columns = ', '.join(column.name for column in index.columns)
+                connection.exec_driver_sql(f"CREATE {'UNIQUE ' if index.unique else ''}INDEX {name} "
+                                           f"ON {_METRICS_STAGING.name} ({columns})")
+        
+        # One short transaction swaps the tables; requests already reading keep the old snapshot.
+        # pysqlite commits DDL implicitly, so the transaction is opened explicitly
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('BEGIN IMMEDIATE' if self.engine.dialect.name == 'sqlite' else 'BEGIN')
+            try:
+                DriverMetrics.__table__.drop(connection)
+                connection.execute(text(f"ALTER TABLE {_METRICS_STAGING.name} RENAME TO {DriverMetrics.__tablename__}"))
+                connection.execute(delete(DataVersion.__table__).where(DataVersion.__table__.c.name == 'driver_metrics'))
+                connection.execute(insert(DataVersion.__table__),
+                                   {'name': 'driver_metrics', 'version': version, 'updated_at': datetime.utcnow()})
+                connection.exec_driver_sql('COMMIT')
+            except Exception:
+                connection.exec_driver_sql('ROLLBACK')
+                raise
+        print(f"Imported {len(records)} driver records")
     
     def _hash_password(self, password):
         return hashlib.sha256(password.encode()).hexdigest()
     
     def register_driver(self, license_plate, license_number, password):
         try:
-            # First check if the license number is already registered
-            existing_license = self.session.query(Driver).filter_by(
-                license_number=license_number
-            ).first()
-            
-            if existing_license:
-                return {
-                    "success": False, 
-                    "error": "This license number is already registered. Please login instead."
-                }
-
-            # Find the driver in the CSV data
-            if self.driver_data is not None:
-                driver_info = self.driver_data[
-                    (self.driver_data['license_plate'] == license_plate) & 
-                    (self.driver_data['license_number'] == license_number)
-                ]
+            with self.session_scope() as session:
+                # First check if the license number is already registered
+                existing_license = session.query(Driver).filter_by(
+                    license_number=license_number
+                ).first()
                 
-                if len(driver_info) == 0:
+                if existing_license:
                     return {
                         "success": False, 
-                        "error": "License plate and license number combination not found in records. Please check your details."
+                        "error": "This license number is already registered. Please login instead."
                     }
-                
-                driver_id = str(driver_info.iloc[0]['driver_id'])
-                
-                # Check if driver_id is already registered
-                existing_driver = self.session.query(Driver).filter_by(driver_id=driver_id).first()
-                if existing_driver:
-                    return {
-                        "success": False, 
-                        "error": "This driver is already registered. Please login instead."
-                    }
-                
-                # Create new driver
-                new_driver = Driver(
-                    driver_id=driver_id,
-                    license_plate=license_plate,
-                    license_number=license_number,
-                    password=self._hash_password(password)
-                )
-                
-                self.session.add(new_driver)
-                self.session.commit()
-                return {"success": True, "driver_id": driver_id}
-            else:
-                return {"success": False, "error": "Driver data not available. Please try again later."}
+
+                # Find the driver in the indexed driver records
+                if session.query(DriverMetrics.driver_id).first() is not None:
+                    driver_info = session.query(DriverMetrics.driver_id).filter_by(
+                        license_number=license_number,
+                        license_plate=license_plate
+                    ).first()
+                    
+                    if driver_info is None:
+                        return {
+                            "success": False, 
+                            "error": "License plate and license number combination not found in records. Please check your details."
+                        }
+                    
+                    driver_id = str(driver_info.driver_id)
+                    
+                    # Check if driver_id is already registered
+                    existing_driver = session.query(Driver).filter_by(driver_id=driver_id).first()
+                    if existing_driver:
+                        return {
+                            "success": False, 
+                            "error": "This driver is already registered. Please login instead."
+                        }
+                    
+                    # A plate belongs to one registration; check it rather than hit the unique constraint
+                    existing_plate = session.query(Driver.id).filter_by(license_plate=license_plate).first()
+                    if existing_plate:
+                        return {
+                            "success": False,
+                            "error": "This license plate is already registered. Please login instead."
+                        }
+                    
+                    # Create new driver
+                    new_driver = Driver(
+                        driver_id=driver_id,
+                        license_plate=license_plate,
+                        license_number=license_number,
+                        password=self._hash_password(password)
+                    )
+                    
+                    session.add(new_driver)
+                    return {"success": True, "driver_id": driver_id}
+                else:
+                    return {"success": False, "error": "Driver data not available. Please try again later."}
         except Exception as e:
-            self.session.rollback()
             return {"success": False, "error": f"Registration error: {str(e)}"}
     
+    def register_drivers_bulk(self, records, batch_size=None):
+        """Register a fleet of (license_plate, license_number, password) records, one result per record"""
+        from .onboarding import ONBOARDING_BATCH_SIZE, onboard_drivers
+        records = list(records)
+        try:
+            return onboard_drivers(self.engine, records, self._hash_password,
+                                   batch_size=batch_size or ONBOARDING_BATCH_SIZE)
+        except Exception as e:
+            return [{"success": False, "error": f"Registration error: {str(e)}"} for _ in records]
+    
     def authenticate_driver(self, license_number, password):
         try:
-            driver = self.session.query(Driver).filter_by(
-                license_number=license_number,
-                password=self._hash_password(password)
-            ).first()
+            with self.session_scope() as session:
+                driver = session.query(Driver).filter_by(
+                    license_number=license_number,
+                    password=self._hash_password(password)
+                ).first()
             
             if driver:
+                # Set on the detached object and buffer the write instead of committing here
                 driver.last_login = datetime.utcnow()
-                self.session.commit()
+                self.login_buffer.record(driver.driver_id, driver.last_login)
                 return {"success": True, "driver": driver}
             return {"success": False, "error": "Invalid credentials. Please try again."}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def update_uib_model(self, driver_id, model_name, lock_period_months=12):
+    def _model_update(self, lock_period_months, respect_lock):
+        """Conditional UPDATE of a driver's model, skipped while an existing lock is still running"""
+        now = datetime.utcnow()
+        lock_until = now + timedelta(days=30*lock_period_months)
+        drivers = Driver.__table__
+        statement = (
+            update(drivers)
+            .where(drivers.c.driver_id == bindparam('b_driver_id'))
+            .values(selected_uib_model=bindparam('b_model'), model_lock_period=lock_until)
+        )
+        if respect_lock:
+            statement = statement.where(or_(drivers.c.model_lock_period.is_(None), drivers.c.model_lock_period <= now))
+        return statement, lock_until
+    
+    def update_uib_model(self, driver_id, model_name, lock_period_months=12, respect_lock=True):
+        """Switch a driver's UIB model in one statement, unless the current model is still locked"""
         try:
-            driver = self.session.query(Driver).filter_by(driver_id=driver_id).first()
-            if driver:
-                driver.selected_uib_model = model_name
-                driver.model_lock_period = datetime.utcnow() + timedelta(days=30*lock_period_months)
-                self.session.commit()
-                return {"success": True}
-            return {"success": False, "error": "Driver not found"}
+            statement, _ = self._model_update(lock_period_months, respect_lock)
+            drivers = Driver.__table__
+            with self.engine.begin() as connection:
+                with fleet_cube_moves(connection, [driver_id], LOOKUP_BATCH_SIZE):
+                    updated = connection.execute(statement, {'b_driver_id': driver_id, 'b_model': model_name}).rowcount
+                if updated:
+                    return {"success": True}
+                # Only a failed update needs to find out why
+                current = connection.execute(
+                    select(drivers.c.model_lock_period).where(drivers.c.driver_id == driver_id)
+                ).first()
+            if current is None:
+                return {"success": False, "error": "Driver not found"}
+            return {"success": False, "error": f"Current model is locked until {current.model_lock_period:%Y-%m-%d}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def update_uib_models(self, selections, lock_period_months=12, respect_lock=True):
+        """
+        Switch many drivers' UIB models in one transaction.
+        
+        selections maps driver_id to model name (or is an iterable of such pairs).
+        Returns an outcome per driver_id in register_driver's result format.
+        """
+        selections = {str(driver_id): model for driver_id, model in dict(selections).items()}
+        try:
+            statement, lock_until = self._model_update(lock_period_months, respect_lock)
+            drivers = Driver.__table__
+            driver_ids = list(selections)
+            current = {}
+            with self.engine.begin() as connection, fleet_cube_moves(connection, driver_ids, LOOKUP_BATCH_SIZE):
+                if driver_ids:
+                    connection.execute(statement, [
+                        {'b_driver_id': driver_id, 'b_model': model} for driver_id, model in selections.items()
+                    ])
+                # Read back inside the same transaction: updated rows carry this batch's lock timestamp
+                for start in range(0, len(driver_ids), LOOKUP_BATCH_SIZE):
+                    rows = connection.execute(
+                        select(drivers.c.driver_id, drivers.c.model_lock_period)
+                        .where(drivers.c.driver_id.in_(driver_ids[start:start + LOOKUP_BATCH_SIZE]))
+                    )
+                    current.update({row.driver_id: row.model_lock_period for row in rows})
+            
+            outcomes = {}
+            for driver_id in driver_ids:
+                if driver_id not in current:
+                    outcomes[driver_id] = {"success": False, "error": "Driver not found"}
+                elif current[driver_id] == lock_until:
+                    outcomes[driver_id] = {"success": True}
+                else:
+                    outcomes[driver_id] = {
+                        "success": False,
+                        "error": f"Current model is locked until {current[driver_id]:%Y-%m-%d}"
+                    }
+            return outcomes
+        except Exception as e:
+            return {driver_id: {"success": False, "error": str(e)} for driver_id in selections}
+    
+    def query_fleet(self, risk_category=None, selected_uib_model=None, vehicle_type=None, driving_style=None,
+                    highest_risk_first=True, limit=FLEET_PAGE_SIZE, after=None):
+        """
+        One page of scored drivers, ordered by comprehensive risk score.
+        
+        Each filter takes a value or a list of values. Pages use keyset pagination
+        on (risk score, driver_id): pass the returned next_cursor as after to get the
+        next page, which costs the same however deep into the fleet it is. Drivers
+        without a score come last in either order.
+        """
+        try:
+            scores = DriverScore.__table__
+            drivers = Driver.__table__
+            query = select(
+                scores.c.driver_id, scores.c.risk_category, scores.c.comprehensive_risk_score,
+                scores.c.vehicle_type, scores.c.driving_style, scores.c.recommended_uib_model,
+                drivers.c.selected_uib_model, drivers.c.id.label('registration_id')
+            ).select_from(scores.outerjoin(drivers, drivers.c.driver_id == cast(scores.c.driver_id, String)))
+            
+            filters = [
+                (scores.c.risk_category, risk_category),
+                (drivers.c.selected_uib_model, selected_uib_model),
+                (scores.c.vehicle_type, vehicle_type),
+                (scores.c.driving_style, driving_style)
+            ]
+            for column, value in filters:
+                if value is not None:
+                    query = query.where(column.in_([value] if isinstance(value, str) else list(value)))
+            
+            # Row comparisons never match a NULL score, so unscored drivers form
+            # their own final group, paged on driver_id alone
+            score = scores.c.comprehensive_risk_score
+            key = tuple_(score, scores.c.driver_id)
+            in_unscored = after is not None and after[0] is None
+            if highest_risk_first:
+                scored = query.where(score.isnot(None)).order_by(score.desc(), scores.c.driver_id.desc())
+                unscored = query.where(score.is_(None)).order_by(scores.c.driver_id.desc())
+                if after is not None:
+                    scored = scored.where(key < tuple_(*after))
+                    unscored = unscored.where(scores.c.driver_id < after[1]) if in_unscored else unscored
+            else:
+                scored = query.where(score.isnot(None)).order_by(score, scores.c.driver_id)
+                unscored = query.where(score.is_(None)).order_by(scores.c.driver_id)
+                if after is not None:
+                    scored = scored.where(key > tuple_(*after))
+                    unscored = unscored.where(scores.c.driver_id > after[1]) if in_unscored else unscored
+            
+            with self.engine.connect() as connection:
+                rows = [] if in_unscored else connection.execute(scored.limit(limit)).all()
+                if len(rows) < limit:
+                    rows += connection.execute(unscored.limit(limit - len(rows))).all()
+            
+            page = [
+                {
+                    "driver_id": str(row.driver_id),
+                    "risk_category": row.risk_category,
+                    "risk_score": row.comprehensive_risk_score,
+                    "vehicle_type": row.vehicle_type,
+                    "driving_style": row.driving_style,
+                    "recommended_uib_model": row.recommended_uib_model,
+                    "selected_uib_model": row.selected_uib_model,
+                    "registered": row.registration_id is not None
+                }
+                for row in rows
+            ]
+            next_cursor = (rows[-1].comprehensive_risk_score, rows[-1].driver_id) if len(rows) == limit else None
+            return {"success": True, "drivers": page, "next_cursor": next_cursor}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def get_driver_scores(self, driver_id):
+        """The pipeline's full scoring result for a driver, in one primary-key lookup"""
+        try:
+            with self.session_scope() as session:
+                scores = _score_values(session.get(DriverScore, int(driver_id)))
+            if scores is None:
+                return {"success": False, "error": "No scores available for this driver yet"}
+            return {"success": True, "scores": scores}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def get_driver_profiles(self, driver_ids):
+        """
+        Metrics and published scores of many drivers, registered or not, in a few
+        primary-key IN queries. Drivers missing from the data file are left out.
+        """
+        try:
+            driver_ids = list(dict.fromkeys(int(driver_id) for driver_id in driver_ids))
+            profiles = {}
+            with self.session_scope() as session:
+                for start in range(0, len(driver_ids), LOOKUP_BATCH_SIZE):
+                    batch = driver_ids[start:start + LOOKUP_BATCH_SIZE]
+                    scores = {score.driver_id: score for score in
+                              session.query(DriverScore).filter(DriverScore.driver_id.in_(batch))}
+                    for metrics in session.query(DriverMetrics).filter(DriverMetrics.driver_id.in_(batch)):
+                        profiles[metrics.driver_id] = {
+                            "additional_info": _driver_info(metrics),
+                            "scores": _score_values(scores.get(metrics.driver_id))
+                        }
+            return {"success": True, "profiles": profiles}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def get_selected_models(self, driver_ids):
+        """UIB models the given drivers have chosen, for those registered with one, in a few IN queries"""
+        try:
+            drivers = Driver.__table__
+            driver_ids = [str(driver_id) for driver_id in dict.fromkeys(driver_ids)]
+            models = {}
+            with self.engine.connect() as connection:
+                for start in range(0, len(driver_ids), LOOKUP_BATCH_SIZE):
+                    rows = connection.execute(
+                        select(drivers.c.driver_id, drivers.c.selected_uib_model)
+                        .where(drivers.c.driver_id.in_(driver_ids[start:start + LOOKUP_BATCH_SIZE]))
+                        .where(drivers.c.selected_uib_model.is_not(None))
+                    )
+                    models.update({int(row.driver_id): row.selected_uib_model for row in rows})
+            return {"success": True, "models": models}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def get_peer_distributions(self, segments):
+        """Published sorted risk scores of the given (dimension, segment) pairs, in one primary-key query"""
+        try:
+            table = PeerDistribution.__table__
+            keys = [tuple(segment) for segment in segments]
+            if not keys:
+                return {"success": True, "distributions": {}}
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    select(table.c.dimension, table.c.segment, table.c.driver_count, table.c.risk_scores,
+                           table.c.data_version)
+                    .where(tuple_(table.c.dimension, table.c.segment).in_(keys))
+                ).all()
+            return {"success": True, "distributions": {
+                (row.dimension, row.segment): {
+                    "driver_count": row.driver_count,
+                    "risk_scores": row.risk_scores,
+                    "data_version": row.data_version
+                }
+                for row in rows
+            }}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def get_fleet_cube(self):
+        """
+        Every cell of the fleet cube, as dicts of the FLEET_CUBE_DIMENSIONS and
+        FLEET_CUBE_MEASURES, with the scores version it was built from (None
+        until the pipeline has published).
+        """
+        try:
+            table = FleetCubeCell.__table__
+            with self.engine.connect() as connection:
+                version = connection.execute(
+                    select(DataVersion.__table__.c.version)
+                    .where(DataVersion.__table__.c.name == FleetCubeCell.__tablename__)
+                ).scalar()
+                rows = connection.execute(select(table)).mappings().all()
+            return {"success": True, "cells": [dict(row) for row in rows], "data_version": version}
         except Exception as e:
-            self.session.rollback()
             return {"success": False, "error": str(e)}
     
     def get_driver_details(self, driver_id):
         try:
-            driver = self.session.query(Driver).filter_by(driver_id=driver_id).first()
+            with self.session_scope() as session:
+                driver = session.query(Driver).filter_by(driver_id=driver_id).first()
+                metrics = session.get(DriverMetrics, int(driver_id)) if driver else None
+                scores = session.get(DriverScore, int(driver_id)) if driver else None
+                metrics_version = session.get(DataVersion, 'driver_metrics') if driver else None
             if driver:
-                # Get additional details from CSV
-                if self.driver_data is not None:
-                    csv_data = self.driver_data[self.driver_data['driver_id'] == int(driver_id)].iloc[0]
+                # Changes whenever the driver data or the published scores are refreshed
+                data_version = ':'.join([
+                    metrics_version.version if metrics_version is not None else '',
+                    scores.data_version if scores is not None else ''
+                ])
+                # Get additional details from the indexed driver records
+                if metrics is not None:
                     return {
                         "success": True,
                         "driver": driver,
-                        "additional_info": {
-                            "age": csv_data['age'],
-                            "driving_style": csv_data['driving_style'],
-                            "vehicle_type": csv_data['vehicle_type'],
-                            "years_of_experience": csv_data['years_of_experience'],
-                            "total_km": csv_data['total_km'],
-                            "sudden_braking_events": csv_data['sudden_braking_events'],
-                            "speeding_events": csv_data['speeding_events'],
-                            "previous_accidents": csv_data['previous_accidents'],
-                            "traffic_fines": csv_data['traffic_fines']
-                        }
+                        "additional_info": _driver_info(metrics),
+                        "scores": _score_values(scores),
+                        "data_version": data_version
                     }
-                return {"success": True, "driver": driver}
+                return {"success": True, "driver": driver, "scores": _score_values(scores), "data_version": data_version}
             return {"success": False, "error": "Driver not found"}
         except Exception as e:
-            return {"success": False, "error": str(e)} 
\ No newline at end of file
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,158 @@
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from .models import Base, PipelineJob
+from datetime import datetime, timedelta
+import hashlib
+import json
+
+JOB_STATUSES = ['pending', 'running', 'succeeded', 'failed', 'cancelled']
+FINISHED_STATUSES = ['succeeded', 'failed', 'cancelled']
+
+def job_key(options):
+    """Stable hash of pipeline options, used to collapse identical requests"""
+    normalized = {name: value for name, value in options.items() if value not in (None, False)}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+def options_to_argv(options):
+    """Turn stored job options into pipeline command-line arguments"""
+    argv = []
+    for name, value in sorted(options.items()):
+        flag = '--' + name.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        elif value not in (None, False):
+            argv.extend([flag, str(value)])
+    return argv
+
+class JobQueue:
+    """Persistent queue of pipeline runs stored in the portal database"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        Base.metadata.create_all(self.engine, tables=[PipelineJob.__table__])
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    def submit(self, options, requested_by=None):
+        """Queue a pipeline run, reusing an identical pending run if there is one"""
+        key = job_key(options)
+        with self.Session() as session:
+            existing = session.query(PipelineJob).filter_by(job_key=key, status='pending').first()
+            if existing:
+                return {"success": True, "job_id": existing.id, "deduplicated": True}
+
+            job = PipelineJob(
+                job_key=key,
+                options=json.dumps(options, sort_keys=True),
+                status='pending',
+                requested_by=requested_by
+            )
+            session.add(job)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another request queued the same run first
+                session.rollback()
+                existing = session.query(PipelineJob).filter_by(job_key=key, status='pending').first()
+                if existing is None:
+                    return {"success": False, "error": "Could not queue the pipeline run. Please try again."}
+                return {"success": True, "job_id": existing.id, "deduplicated": True}
+            return {"success": True, "job_id": job.id, "deduplicated": False}
+
+    def get_job(self, job_id):
+        with self.Session() as session:
+            return session.get(PipelineJob, job_id)
+
+    def list_jobs(self, limit=20):
+        """Most recent jobs first"""
+        with self.Session() as session:
+            return session.query(PipelineJob).order_by(PipelineJob.id.desc()).limit(limit).all()
+
+    def cancel(self, job_id):
+        """Cancel a pending job, or ask the worker to stop a running one"""
+        with self.Session() as session:
+            now = datetime.utcnow()
+            pending = session.execute(
+                update(PipelineJob)
+                .where(PipelineJob.id == job_id, PipelineJob.status == 'pending')
+                .values(status='cancelled', message='Cancelled before start', finished_at=now, updated_at=now)
+            )
+            if pending.rowcount:
+                session.commit()
+                return {"success": True, "status": 'cancelled'}
+
+            running = session.execute(
+                update(PipelineJob)
+                .where(PipelineJob.id == job_id, PipelineJob.status == 'running')
+                .values(cancel_requested=True, updated_at=now)
+            )
+            session.commit()
+            if running.rowcount:
+                return {"success": True, "status": 'cancelling'}
+            return {"success": False, "error": "Job is not pending or running"}
+
+    def claim_next(self):
+        """Atomically move the oldest pending job to running and return it"""
+        with self.Session() as session:
+            while True:
+                job = session.query(PipelineJob).filter_by(status='pending').order_by(PipelineJob.id).first()
+                if job is None:
+                    return None
+                now = datetime.utcnow()
+                claimed = session.execute(
+                    update(PipelineJob)
+                    .where(PipelineJob.id == job.id, PipelineJob.status == 'pending')
+                    .values(status='running', started_at=now, updated_at=now)
+                )
+                session.commit()
+                if claimed.rowcount:
+                    session.refresh(job)
+                    return job
+
+    def update_progress(self, job_id, progress, stage=None, message=None):
+        """Record progress and return True if cancellation has been requested"""
+        with self.Session() as session:
+            session.execute(
+                update(PipelineJob)
+                .where(PipelineJob.id == job_id, PipelineJob.status == 'running')
+                .values(progress=progress, current_stage=stage, message=message, updated_at=datetime.utcnow())
+            )
+            session.commit()
+            job = session.get(PipelineJob, job_id)
+            return bool(job and job.cancel_requested)
+
+    def heartbeat(self, job_id):
+        """Show that the worker running a job is still alive"""
+        with self.Session() as session:
+            session.execute(
+                update(PipelineJob)
+                .where(PipelineJob.id == job_id, PipelineJob.status == 'running')
+                .values(updated_at=datetime.utcnow())
+            )
+            session.commit()
+
+    def finish(self, job_id, status, message=None):
+        """Mark a running job as succeeded, failed or cancelled"""
+        with self.Session() as session:
+            now = datetime.utcnow()
+            values = {'status': status, 'message': message, 'finished_at': now, 'updated_at': now}
+            if status == 'succeeded':
+                values['progress'] = 1.0
+            session.execute(
+                update(PipelineJob)
+                .where(PipelineJob.id == job_id, PipelineJob.status == 'running')
+                .values(**values)
+            )
+            session.commit()
+
+    def fail_stale(self, timeout_minutes=60):
+        """Fail running jobs whose worker stopped reporting progress"""
+        cutoff = datetime.utcnow() - timedelta(minutes=timeout_minutes)
+        with self.Session() as session:
+            result = session.execute(
+                update(PipelineJob)
+                .where(PipelineJob.status == 'running', PipelineJob.updated_at < cutoff)
+                .values(status='failed', message='Worker stopped responding', finished_at=datetime.utcnow())
+            )
+            session.commit()
+            return result.rowcount
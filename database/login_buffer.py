@@ -0,0 +1,72 @@
+from sqlalchemy import bindparam, update
+from .models import Driver
+import threading
+
+class LastLoginBuffer:
+    """Write-behind buffer that batches Driver.last_login updates off the login path"""
+
+    def __init__(self, engine, flush_interval=5.0, max_pending=1000):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._statement = (
+            update(Driver.__table__)
+            .where(Driver.__table__.c.driver_id == bindparam('b_driver_id'))
+            .values(last_login=bindparam('b_last_login'))
+        )
+        self._thread = threading.Thread(target=self._run, name='last-login-flusher', daemon=True)
+        self._thread.start()
+
+    def record(self, driver_id, timestamp):
+        """Remember a login; only the latest timestamp per driver is kept"""
+        with self._lock:
+            self._pending[driver_id] = timestamp
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write all buffered logins in one transaction, returning how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(self._statement, [
+                        {'b_driver_id': driver_id, 'b_last_login': timestamp}
+                        for driver_id, timestamp in batch.items()
+                    ])
+            except Exception as e:
+                # Put the batch back, without overwriting newer logins, and retry next time
+                with self._lock:
+                    for driver_id, timestamp in batch.items():
+                        self._pending.setdefault(driver_id, timestamp)
+                print(f"Error flushing login timestamps: {e}")
+                return 0
+            return len(batch)
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the background thread and write anything still buffered"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
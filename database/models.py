@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import uuid
@@ -19,5 +19,150 @@ class Driver(Base):
     selected_uib_model = Column(String(50))
     model_lock_period = Column(DateTime)
     
+    __table_args__ = (
+        # Renewal scans walk expiring locks in (model_lock_period, id) order
+        Index('ix_drivers_model_lock_period', 'model_lock_period', 'id'),
+        Index('ix_drivers_selected_model', 'selected_uib_model', 'driver_id'),
+    )
+    
+    def __repr__(self):
+        return f"<Driver(driver_id='{self.driver_id}', license_plate='{self.license_plate}')>"
+
+class DriverMetrics(Base):
+    __tablename__ = 'driver_metrics'
+    
+    driver_id = Column(Integer, primary_key=True)
+    license_number = Column(String(50), nullable=False)
+    license_plate = Column(String(20), nullable=False)
+    age = Column(Integer)
+    driving_style = Column(String(20))
+    vehicle_type = Column(String(20))
+    years_of_experience = Column(Integer)
+    total_km = Column(Float)
+    sudden_braking_events = Column(Integer)
+    speeding_events = Column(Integer)
+    previous_accidents = Column(Integer)
+    traffic_fines = Column(Integer)
+    data_date = Column(String(10))
+    behavior_risk_score = Column(Float)
+    
+    __table_args__ = (
+        Index('ix_driver_metrics_license', 'license_number', 'license_plate'),
+    )
+    
+    def __repr__(self):
+        return f"<DriverMetrics(driver_id={self.driver_id}, license_number='{self.license_number}')>"
+
+class DriverScore(Base):
+    __tablename__ = 'driver_scores'
+    
+    # Materialized by the pipeline's publish stage; one row per scored driver
+    driver_id = Column(Integer, primary_key=True)
+    vehicle_type = Column(String(20))
+    driving_style = Column(String(20))
+    risk_cluster = Column(Integer)
+    risk_category = Column(String(10))
+    braking_risk = Column(Float)
+    speeding_risk = Column(Float)
+    experience_factor = Column(Float)
+    previous_accidents = Column(Integer)
+    comprehensive_risk_score = Column(Float)
+    behavior_risk_score = Column(Float)
+    recommended_uib_model = Column(String(50))
+    monthly_km = Column(Float)
+    premium_risk_score = Column(Float)
+    behavior_weight = Column(Float)
+    payd_premium = Column(Float)
+    phyd_premium = Column(Float)
+    recommended_premium_model = Column(String(10))
+    data_version = Column(String(100), nullable=False)
+    scored_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Fleet listings page through drivers by risk score, optionally within a filter
+        Index('ix_driver_scores_risk', 'comprehensive_risk_score', 'driver_id'),
+        Index('ix_driver_scores_category_risk', 'risk_category', 'comprehensive_risk_score', 'driver_id'),
+        Index('ix_driver_scores_segment_risk', 'vehicle_type', 'driving_style', 'comprehensive_risk_score', 'driver_id'),
+    )
+    
+    def __repr__(self):
+        return f"<DriverScore(driver_id={self.driver_id}, risk_category='{self.risk_category}')>"
+
+class PeerDistribution(Base):
+    __tablename__ = 'peer_distributions'
+    
+    # Published with the scores: the sorted risk scores of every driver in a peer
+    # segment (the fleet, a vehicle type, a driving style or an age band)
+    dimension = Column(String(20), primary_key=True)
+    segment = Column(String(20), primary_key=True)
+    driver_count = Column(Integer, nullable=False)
+    risk_scores = Column(LargeBinary, nullable=False)  # Ascending float32 values
+    data_version = Column(String(100), nullable=False)
+    
+    def __repr__(self):
+        return f"<PeerDistribution(dimension='{self.dimension}', segment='{self.segment}', drivers={self.driver_count})>"
+
+class FleetCubeCell(Base):
+    __tablename__ = 'fleet_cube'
+    
+    # Rebuilt by the publish stage and kept current as drivers switch models: the
+    # scored drivers of one risk category, selected UIB model ('' before choosing),
+    # vehicle type and driving style. Every measure is a count or a sum, so cells
+    # can be updated in place and rolled up along any dimension.
+    risk_category = Column(String(10), primary_key=True)
+    selected_uib_model = Column(String(50), primary_key=True)
+    vehicle_type = Column(String(20), primary_key=True)
+    driving_style = Column(String(20), primary_key=True)
+    driver_count = Column(Integer, nullable=False)
+    comprehensive_risk_count = Column(Integer, nullable=False)  # Drivers with a comprehensive risk score
+    comprehensive_risk_sum = Column(Float, nullable=False)
+    behavior_risk_sum = Column(Float, nullable=False)
+    previous_accidents_sum = Column(Integer, nullable=False)
+    monthly_km_sum = Column(Float, nullable=False)
+    payd_premium_sum = Column(Float, nullable=False)
+    phyd_premium_sum = Column(Float, nullable=False)
+    premium_difference_sum = Column(Float, nullable=False)  # |PAYD - PHYD| premium, the potential saving
+    payd_recommended = Column(Integer, nullable=False)
+    phyd_recommended = Column(Integer, nullable=False)
+    mhyd_recommended = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return (f"<FleetCubeCell(risk_category='{self.risk_category}', selected_uib_model='{self.selected_uib_model}', "
+                f"vehicle_type='{self.vehicle_type}', driving_style='{self.driving_style}', drivers={self.driver_count})>")
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+    
+    name = Column(String(50), primary_key=True)
+    version = Column(String(100), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class PipelineJob(Base):
+    __tablename__ = 'pipeline_jobs'
+    
+    id = Column(Integer, primary_key=True)
+    job_key = Column(String(64), nullable=False)  # Hash of the normalized pipeline options
+    options = Column(Text, nullable=False)  # JSON object of pipeline command-line options
+    status = Column(String(20), nullable=False, default='pending')
+    progress = Column(Float, nullable=False, default=0.0)
+    current_stage = Column(String(50))
+    message = Column(Text)
+    requested_by = Column(String(50))
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ix_pipeline_jobs_status_created', 'status', 'created_at'),
+        # At most one pending job per set of options, so identical requests collapse.
+        # Only created where it can be partial; elsewhere JobQueue.submit's lookup
+        # of a pending job with the same key does the collapsing on its own
+        Index('ux_pipeline_jobs_pending_key', 'job_key', unique=True,
+              sqlite_where=(status == 'pending'),
+              postgresql_where=(status == 'pending')).ddl_if(dialect=('sqlite', 'postgresql')),
+    )
+    
     def __repr__(self):
-        return f"<Driver(driver_id='{self.driver_id}', license_plate='{self.license_plate}')>" 
\ No newline at end of file
+        return f"<PipelineJob(id={self.id}, status='{self.status}', progress={self.progress:.0%})>"
@@ -0,0 +1,167 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table, and_, cast, delete, insert, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from .models import Driver, DriverMetrics
+from collections.abc import Mapping
+import time
+import numpy as np
+import pandas as pd
+
+ONBOARDING_COLUMNS = ['license_plate', 'license_number', 'password']
+ONBOARDING_BATCH_SIZE = 50000
+ONBOARDING_RETRIES = 3
+ONBOARDING_RETRY_DELAY = 0.05  # Seconds before the first retry, growing with each attempt
+
+# Same messages as single registration, so the portal and fleet tools agree
+ONBOARDING_ERRORS = {
+    'missing': "License plate, license number and password are required.",
+    'duplicate_license': "This license number appears more than once in the batch.",
+    'license_registered': "This license number is already registered. Please login instead.",
+    'not_found': "License plate and license number combination not found in records. Please check your details.",
+    'driver_registered': "This driver is already registered. Please login instead.",
+    'duplicate_plate': "This license plate appears more than once in the batch.",
+    'plate_registered': "This license plate is already registered. Please login instead.",
+    'no_data': "Driver data not available. Please try again later."
+}
+
+# Per-connection staging table, so the batch is checked with joins instead of per-record queries
+_staging_metadata = MetaData()
+_onboarding_batch = Table(
+    'onboarding_batch', _staging_metadata,
+    Column('position', Integer, primary_key=True),
+    Column('license_plate', String(20)),
+    Column('license_number', String(50)),
+    prefixes=['TEMPORARY']
+)
+
+def _match_query():
+    """Each staged record with its driver_id and any existing registration it collides with"""
+    batch = _onboarding_batch
+    metrics = DriverMetrics.__table__
+    drivers = Driver.__table__
+    by_license = drivers.alias('by_license')
+    by_driver = drivers.alias('by_driver')
+    by_plate = drivers.alias('by_plate')
+    joined = (
+        batch
+        .outerjoin(metrics, and_(metrics.c.license_number == batch.c.license_number,
+                                 metrics.c.license_plate == batch.c.license_plate))
+        .outerjoin(by_license, by_license.c.license_number == batch.c.license_number)
+        .outerjoin(by_driver, by_driver.c.driver_id == cast(metrics.c.driver_id, String))
+        .outerjoin(by_plate, by_plate.c.license_plate == batch.c.license_plate)
+    )
+    return select(
+        batch.c.position,
+        metrics.c.driver_id,
+        by_license.c.id.label('license_taken'),
+        by_driver.c.id.label('driver_taken'),
+        by_plate.c.id.label('plate_taken')
+    ).select_from(joined)
+
+def _records_frame(records):
+    """Batch as a frame of strings, accepting dicts or (plate, license, password) tuples"""
+    rows = [
+        tuple(record.get(column) for column in ONBOARDING_COLUMNS) if isinstance(record, Mapping) else tuple(record)
+        for record in records
+    ]
+    batch = pd.DataFrame(rows, columns=ONBOARDING_COLUMNS)
+    missing = batch.isna() | (batch.astype(str).apply(lambda column: column.str.strip()) == '')
+    batch = batch.astype(object).where(~missing, None)
+    batch['missing'] = missing.any(axis=1)
+    return batch
+
+def _classify(batch, matches):
+    """
+    Vectorized error code per record, in the order single registration checks
+    them; the in-batch duplicate checks have no single-record counterpart and
+    only count records that pass every other check, so a rejected first
+    occurrence does not block a later valid one.
+    """
+    matched = batch.join(matches.set_index('position'))
+    conditions = [
+        matched['missing'].to_numpy(),
+        matched['license_taken'].notna().to_numpy(),
+        matched['driver_id'].isna().to_numpy(),
+        matched['driver_taken'].notna().to_numpy(),
+        matched['plate_taken'].notna().to_numpy()
+    ]
+    eligible = ~np.logical_or.reduce(conditions)
+    duplicate_license = eligible & matched['license_number'].where(eligible).duplicated().to_numpy()
+    eligible &= ~duplicate_license
+    duplicate_plate = eligible & matched['license_plate'].where(eligible).duplicated().to_numpy()
+    codes = ['missing', 'license_registered', 'not_found', 'driver_registered', 'plate_registered',
+             'duplicate_license', 'duplicate_plate']
+    matched['error'] = np.select(conditions + [duplicate_license, duplicate_plate], codes, default='')
+    return matched
+
+def _onboard_chunk(connection, batch, hash_password):
+    """Validate one chunk against the driver tables and insert the accepted records"""
+    _onboarding_batch.create(connection, checkfirst=True)
+    connection.execute(delete(_onboarding_batch))
+    staged = batch[~batch['missing']]
+    if len(staged):
+        connection.execute(insert(_onboarding_batch), [
+            {'position': position, 'license_plate': plate, 'license_number': number}
+            for position, plate, number in zip(staged.index.tolist(), staged['license_plate'], staged['license_number'])
+        ])
+    rows = connection.execute(_match_query()).all()
+    matches = pd.DataFrame(rows, columns=['position', 'driver_id', 'license_taken', 'driver_taken', 'plate_taken'])
+    matches = matches.drop_duplicates('position').astype({'position': 'int64'})
+    connection.execute(delete(_onboarding_batch))
+
+    result = _classify(batch, matches)
+    accepted = result[result['error'] == '']
+    if len(accepted):
+        connection.execute(insert(Driver.__table__), [
+            {'driver_id': str(int(driver_id)), 'license_plate': plate,
+             'license_number': number, 'password': hash_password(password)}
+            for driver_id, plate, number, password in zip(
+                accepted['driver_id'], accepted['license_plate'],
+                accepted['license_number'], accepted['password'])
+        ])
+    return result
+
+def _results(result):
+    return [
+        {"success": True, "driver_id": str(int(driver_id))} if not error
+        else {"success": False, "error": ONBOARDING_ERRORS[error]}
+        for driver_id, error in zip(result['driver_id'], result['error'])
+    ]
+
+def onboard_drivers(engine, records, hash_password, batch_size=ONBOARDING_BATCH_SIZE):
+    """
+    Register a fleet of drivers in one pass.
+
+    records are dicts or (license_plate, license_number, password) tuples. Each
+    chunk of batch_size records is staged into a temporary table, checked against
+    the driver records and existing registrations with a single join, and the
+    accepted drivers are inserted with executemany in the same transaction.
+    Returns one result per record, in input order, in register_driver's format.
+    """
+    batch = _records_frame(records)
+    if batch.empty:
+        return []
+
+    with engine.connect() as connection:
+        if connection.execute(select(DriverMetrics.driver_id).limit(1)).first() is None:
+            return [{"success": False, "error": ONBOARDING_ERRORS['no_data']} for _ in range(len(batch))]
+
+    results = []
+    for start in range(0, len(batch), batch_size):
+        chunk = batch.iloc[start:start + batch_size]
+        for attempt in range(ONBOARDING_RETRIES):
+            try:
+                with engine.begin() as connection:
+                    result = _onboard_chunk(connection, chunk, hash_password)
+                results.extend(_results(result))
+                break
+            except (IntegrityError, OperationalError) as e:
+                # A concurrent registration won the race; re-check the chunk against the new state
+                if attempt == ONBOARDING_RETRIES - 1:
+                    results.extend({"success": False, "error": f"Registration error: {str(e)}"} for _ in range(len(chunk)))
+                else:
+                    # Give the competing writer time to commit or release its lock
+                    time.sleep(ONBOARDING_RETRY_DELAY * (attempt + 1))
+            except Exception as e:
+                results.extend({"success": False, "error": f"Registration error: {str(e)}"} for _ in range(len(chunk)))
+                break
+    return results
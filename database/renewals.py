@@ -0,0 +1,68 @@
+from sqlalchemy import Integer, cast, select, tuple_
+from .models import Driver, DriverMetrics, DriverScore
+from datetime import datetime, timedelta
+
+RENEWAL_BATCH_SIZE = 5000
+RENEWAL_COLUMNS = [
+    'driver_id', 'license_number', 'selected_uib_model', 'model_lock_period',
+    'recommended_uib_model', 'risk_category', 'switch_recommended'
+]
+
+def _expiring_query(start, end, batch_size):
+    """One page of drivers whose lock ends in [start, end), with their latest scores"""
+    return (
+        select(
+            Driver.id, Driver.driver_id, Driver.license_number, Driver.selected_uib_model, Driver.model_lock_period,
+            DriverScore.recommended_uib_model, DriverScore.risk_category, DriverMetrics.behavior_risk_score
+        )
+        .outerjoin(DriverScore, DriverScore.driver_id == cast(Driver.driver_id, Integer))
+        .outerjoin(DriverMetrics, DriverMetrics.driver_id == cast(Driver.driver_id, Integer))
+        .where(Driver.model_lock_period >= start, Driver.model_lock_period < end)
+        .order_by(Driver.model_lock_period, Driver.id)
+        .limit(batch_size)
+    )
+
+def iter_renewal_candidates(engine, within_days=30, now=None, batch_size=RENEWAL_BATCH_SIZE):
+    """
+    Stream drivers whose UIB model lock expires within the next within_days days.
+
+    Pages are fetched with keyset pagination on (model_lock_period, id), which the
+    ix_drivers_model_lock_period index serves directly, so memory and time per page
+    stay constant however many policies there are. Each candidate comes with the
+    pipeline's current recommendation, or one derived from the driver's behavior
+    risk score if the driver has not been scored yet.
+    """
+    # Imported here so that importing the database layer does not load NumPy
+    from src.functionalities.scoring import recommend_uib_models
+    start = now or datetime.utcnow()
+    end = start + timedelta(days=within_days)
+    last = None
+    while True:
+        query = _expiring_query(start, end, batch_size)
+        if last is not None:
+            query = query.where(tuple_(Driver.model_lock_period, Driver.id) > tuple_(*last))
+        with engine.connect() as connection:
+            rows = connection.execute(query).all()
+        if not rows:
+            return
+
+        unscored = [row.behavior_risk_score for row in rows if row.recommended_uib_model is None]
+        derived = iter(recommend_uib_models(unscored)) if unscored else iter(())
+        for row in rows:
+            recommended = row.recommended_uib_model
+            if recommended is None:
+                recommended = next(derived)
+                if row.behavior_risk_score is None:
+                    recommended = None
+            yield {
+                'driver_id': row.driver_id,
+                'license_number': row.license_number,
+                'selected_uib_model': row.selected_uib_model,
+                'model_lock_period': row.model_lock_period,
+                'recommended_uib_model': recommended,
+                'risk_category': row.risk_category,
+                'switch_recommended': recommended is not None and recommended != row.selected_uib_model
+            }
+        if len(rows) < batch_size:
+            return
+        last = (rows[-1].model_lock_period, rows[-1].id)
@@ -0,0 +1,88 @@
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from .models import DriverScore, DataVersion, PeerDistribution
+from .db_manager import _column_values, ensure_schema
+from .analytics import rebuild_fleet_cube
+from datetime import datetime
+
+SCORE_COLUMNS = [column.name for column in DriverScore.__table__.columns
+                 if column.name not in ('data_version', 'scored_at')]
+PUBLISH_BATCH_SIZE = 50000
+
+def _upsert_statement(connection):
+    """INSERT ... ON CONFLICT (driver_id) DO UPDATE, where the database supports it"""
+    table = DriverScore.__table__
+    if connection.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    statement = dialect_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.driver_id],
+        set_={column.name: statement.excluded[column.name] for column in table.columns if not column.primary_key}
+    )
+
+def published_scores_version(engine):
+    """Version of the scores currently published, or None if the database holds none"""
+    versions = DataVersion.__table__
+    table = DriverScore.__table__
+    try:
+        with engine.connect() as connection:
+            version = connection.execute(
+                select(versions.c.version).where(versions.c.name == 'driver_scores')
+            ).scalar()
+            # A stamp without rows means the scores table was emptied since
+            if version is None or connection.execute(
+                select(table.c.driver_id).where(table.c.data_version == version).limit(1)
+            ).first() is None:
+                return None
+            return version
+    except SQLAlchemyError:
+        # No schema yet
+        return None
+
+def publish_driver_scores(engine, scores, version, peer_distributions=()):
+    """
+    Upsert one pipeline run's per-driver scores into the portal database.
+
+    scores has one row per driver with the SCORE_COLUMNS. Rows are written in
+    batches inside a single transaction, so the portal sees either the previous
+    run or this one; drivers the run no longer covers are removed. The run's
+    peer_distributions (records of the peer_distributions table, without the
+    version) replace the previous ones in the same transaction, and the fleet
+    cube is rebuilt from the new scores.
+    """
+    ensure_schema(engine)
+    columns = [_column_values(scores[column]) for column in SCORE_COLUMNS]
+    scored_at = datetime.utcnow()
+    records = [
+        {**dict(zip(SCORE_COLUMNS, row)), 'data_version': version, 'scored_at': scored_at}
+        for row in zip(*columns)
+    ]
+
+    table = DriverScore.__table__
+    with engine.begin() as connection:
+        statement = _upsert_statement(connection)
+        for start in range(0, len(records), PUBLISH_BATCH_SIZE):
+            batch = records[start:start + PUBLISH_BATCH_SIZE]
+            if statement is None:
+                connection.execute(delete(table).where(table.c.driver_id.in_([r['driver_id'] for r in batch])))
+                connection.execute(insert(table), batch)
+            else:
+                connection.execute(statement, batch)
+        connection.execute(delete(table).where(table.c.data_version != version))
+        connection.execute(delete(PeerDistribution.__table__))
+        if peer_distributions:
+            connection.execute(insert(PeerDistribution.__table__),
+                               [{**record, 'data_version': version} for record in peer_distributions])
+        rebuild_fleet_cube(connection, version)
+        connection.execute(delete(DataVersion.__table__).where(DataVersion.__table__.c.name == 'driver_scores'))
+        connection.execute(insert(DataVersion.__table__),
+                           {'name': 'driver_scores', 'version': version, 'updated_at': scored_at})
+    # Fresh statistics let the planner pick the ordered index scans fleet listings rely on
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"ANALYZE {table.name}")
+    print(f"Published scores for {len(records)} drivers")
+    return len(records)
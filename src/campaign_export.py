@@ -0,0 +1,159 @@
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from database.campaigns import CAMPAIGN_BATCH_SIZE, iter_campaign_inputs
+from database.db_manager import DEFAULT_DB_URL, create_portal_engine, ensure_schema
+from src.functionalities.scoring import (BASE_MONTHLY_PREMIUM, UIB_MODELS, monthly_premium_estimates,
+                                         recommendation_tiers, suitability_scores)
+
+CAMPAIGN_COLUMNS = [
+    'rank', 'driver_id', 'vehicle_type', 'driving_style', 'risk_score', 'recommended_uib_model',
+    'payd_suitability', 'phyd_suitability', 'mhyd_suitability',
+    'payd_monthly_premium', 'phyd_monthly_premium', 'mhyd_monthly_premium', 'monthly_savings'
+]
+WRITE_CHUNK_SIZE = 50000
+
+def score_campaign(batches):
+    """
+    Recommendation tier, model suitability and estimated monthly premiums of every
+    driver, scored one input batch at a time with the scoring engine. Returns
+    compact column arrays for the whole book; monthly_savings is what the driver
+    would save against the base premium on the recommended model.
+    """
+    parts = []
+    for batch in batches:
+        risk_scores = np.asarray(batch['behavior_risk_score'], dtype='float64')
+        total_km = np.asarray(batch['total_km'], dtype='float64')
+        styles = np.asarray(batch['driving_style'], dtype=object)
+        tiers = recommendation_tiers(risk_scores)
+        estimates = monthly_premium_estimates(total_km, risk_scores)
+        parts.append({
+            'driver_id': np.asarray(batch['driver_id'], dtype='int64'),
+            'vehicle_type': np.asarray(batch['vehicle_type'], dtype=object),
+            'driving_style': styles,
+            'risk_score': risk_scores.astype('float32'),
+            'tier': tiers.astype('int8'),
+            'suitability': suitability_scores(risk_scores, total_km / 12, styles).astype('float32'),
+            'monthly_premiums': estimates.astype('float32'),
+            'monthly_savings': BASE_MONTHLY_PREMIUM - estimates[np.arange(len(tiers)), tiers]
+        })
+    if not parts:
+        return None
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def rank_by_savings(campaign, top=None):
+    """Row order from the largest to the smallest saving, ties by driver ID; only the first top rows if given"""
+    savings = campaign['monthly_savings']
+    candidates = np.arange(len(savings))
+    if top is not None and top < len(savings):
+        # Only drivers saving at least the top-th largest amount need sorting
+        cutoff = np.partition(savings, len(savings) - top)[len(savings) - top]
+        candidates = np.flatnonzero(savings >= cutoff)
+    order = candidates[np.lexsort((campaign['driver_id'][candidates], -savings[candidates]))]
+    return order if top is None else order[:top]
+
+def campaign_chunks(campaign, order, chunk_size=WRITE_CHUNK_SIZE):
+    """Ranked campaign columns, rounded for export, one chunk of rows at a time"""
+    models = np.asarray(UIB_MODELS, dtype=object)
+    for start in range(0, len(order), chunk_size):
+        rows = order[start:start + chunk_size]
+        suitability = np.round(campaign['suitability'][rows].astype('float64'), 1)
+        premiums = np.round(campaign['monthly_premiums'][rows].astype('float64'), 2)
+        yield dict(zip(CAMPAIGN_COLUMNS, [
+            np.arange(start + 1, start + len(rows) + 1),
+            campaign['driver_id'][rows],
+            campaign['vehicle_type'][rows],
+            campaign['driving_style'][rows],
+            np.round(campaign['risk_score'][rows].astype('float64'), 4),
+            models[campaign['tier'][rows]],
+            *suitability.T,
+            *premiums.T,
+            np.round(campaign['monthly_savings'][rows], 2)
+        ]))
+
+def write_campaign(output, campaign, order, chunk_size=WRITE_CHUNK_SIZE):
+    """
+    Write the ranked campaign chunk by chunk, as CSV (to a path, or stdout for '-')
+    or Parquet. pyarrow writes both when installed; CSV falls back to the csv module.
+    """
+    chunks = campaign_chunks(campaign, order, chunk_size)
+    stream = sys.stdout.buffer if output == '-' else output
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+    except ImportError:
+        if str(output).endswith('.parquet'):
+            raise RuntimeError("Writing Parquet requires the optional 'pyarrow' package")
+        pa = None
+
+    if pa is None:
+        f = sys.stdout if output == '-' else open(output, 'w', newline='')
+        try:
+            writer = csv.writer(f)
+            writer.writerow(CAMPAIGN_COLUMNS)
+            for chunk in chunks:
+                writer.writerows(zip(*[column.tolist() for column in chunk.values()]))
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        return
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table({name: pa.array(column) for name, column in chunk.items()})
+            if writer is None:
+                if str(output).endswith('.parquet'):
+                    writer = pq.ParquetWriter(stream, table.schema)
+                else:
+                    options = pa_csv.WriteOptions(quoting_style='needed')
+                    writer = pa_csv.CSVWriter(stream, table.schema, write_options=options)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score every driver for UIB models and export a campaign ranked by potential savings.")
+    parser.add_argument('--db-url', default=DEFAULT_DB_URL,
+                        help="Portal database to read the drivers from")
+    parser.add_argument('--output', default='uib_campaign.csv',
+                        help="CSV or .parquet file to write, or - for CSV on stdout")
+    parser.add_argument('--top', type=int,
+                        help="Only export the drivers with the largest savings")
+    parser.add_argument('--batch-size', type=int, default=CAMPAIGN_BATCH_SIZE,
+                        help="Drivers read and scored per batch")
+    args = parser.parse_args(argv)
+    if args.top is not None and args.top < 1:
+        parser.error("--top must be positive")
+
+    engine = create_portal_engine(args.db_url)
+    ensure_schema(engine)
+    campaign = score_campaign(iter_campaign_inputs(engine, args.batch_size))
+    engine.dispose()
+    if campaign is None:
+        print("No driver data to score", file=sys.stderr)
+        return 1
+
+    order = rank_by_savings(campaign, args.top)
+    write_campaign(args.output, campaign, order)
+
+    # Progress goes to stderr so the campaign itself can be streamed on stdout
+    tiers = np.bincount(campaign['tier'], minlength=len(UIB_MODELS))
+    print(f"Scored {len(campaign['driver_id'])} drivers: "
+          + ", ".join(f"{count} {model}" for model, count in zip(UIB_MODELS, tiers)), file=sys.stderr)
+    print(f"Campaign of {len(order)} drivers saved to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+from src.lru_cache import LRUCache
+
+FIGURE_CACHE_SIZE = 2000
+
+# Chart figures keyed by chart name and (driver_id, data_version), shared by every portal session
+figure_cache = LRUCache(FIGURE_CACHE_SIZE)
@@ -2,6 +2,14 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import random
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.functionalities.schema import apply_schema
 
 class DriverDataGenerator:
     def __init__(self, num_drivers=100, days=30):
@@ -119,11 +127,11 @@ class DriverDataGenerator:
             'traffic_fines': traffic_fines
         }
     
-    def generate_driver_data(self):
-        """Generate complete dataset for all drivers"""
+    def generate_driver_data(self, start_id=1):
+        """Generate complete dataset for all drivers, numbering IDs from start_id"""
         data = []
         
-        for driver_id in range(1, self.num_drivers + 1):
+        for driver_id in range(start_id, start_id + self.num_drivers):
             # Generate base profile
             profile = self.generate_driver_profile()
             
@@ -140,7 +148,7 @@ class DriverDataGenerator:
             
             data.append(driver_data)
         
-        return pd.DataFrame(data)
+        return apply_schema(pd.DataFrame(data))
     
     def save_to_csv(self, data, filepath='data/driver_data.csv'):
         """Save generated data to CSV file"""
@@ -163,7 +171,7 @@ def main():
     print(driver_data['vehicle_type'].value_counts(normalize=True) * 100)
     
     print("\nMetrics by Driving Style:")
-    print(driver_data.groupby('driving_style')[
+    print(driver_data.groupby('driving_style', observed=True)[
         ['total_km', 'sudden_braking_events', 'speeding_events', 'traffic_fines']
     ].mean())
     
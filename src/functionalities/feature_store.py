@@ -0,0 +1,121 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from src.functionalities.scoring import behavior_risk_scores, event_rates
+
+# Bump whenever the definition of a stored feature changes
+FEATURE_STORE_VERSION = 1
+
+# Features used by the clustering and classification models
+MODEL_FEATURES = [
+    'sudden_braking_events', 'speeding_events',
+    'previous_accidents', 'traffic_fines',
+    'total_km', 'age', 'years_of_experience'
+]
+RISK_FEATURES = MODEL_FEATURES[:5]
+
+# Raw columns the features are derived from; a change to any of them invalidates the store
+SOURCE_COLUMNS = ['driver_id', 'driving_style'] + MODEL_FEATURES
+
+def source_fingerprint(data):
+    """Hash the source columns so stored features can be matched to their data"""
+    source = pd.DataFrame({
+        column: data[column].astype(str) if column == 'driving_style' else data[column].astype('float64')
+        for column in SOURCE_COLUMNS
+    })
+    row_hashes = pd.util.hash_pandas_object(source, index=False).values
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+
+def compute_features(data):
+    """Compute every derived driver feature in one vectorized pass"""
+    features = pd.DataFrame(index=data.index)
+    # Nullable integer counts become float64 with NaN for the arithmetic below
+    values = {column: data[column].astype('float64') for column in MODEL_FEATURES}
+
+    # Mean imputation followed by standard scaling (population std, like StandardScaler)
+    for column in MODEL_FEATURES:
+        imputed = values[column].fillna(values[column].mean())
+        std = imputed.std(ddof=0)
+        features[f'imputed_{column}'] = imputed
+        features[f'scaled_{column}'] = (imputed - imputed.mean()) / (std if std > 0 else 1.0)
+
+    total_km = values['total_km']
+
+    # Event rates per 1000km, left missing where telemetry is missing
+    features['braking_per_1000km'] = values['sudden_braking_events'] / total_km * 1000
+    features['speeding_per_1000km'] = values['speeding_events'] / total_km * 1000
+
+    # Event rates per 100km with style-based imputation, and the behavior risk score,
+    # from the scoring engine so single-driver scoring matches the store exactly
+    styles = data['driving_style'].astype(str).to_numpy()
+    features['braking_per_100km'], features['speeding_per_100km'] = event_rates(
+        total_km, values['sudden_braking_events'], values['speeding_events'], styles)
+    features['behavior_risk_score'] = behavior_risk_scores(
+        values['sudden_braking_events'], values['speeding_events'],
+        values['previous_accidents'], values['traffic_fines'])
+
+    # Computed in float64, stored in float32 to keep the store compact
+    return features.astype('float32')
+
+class FeatureStore:
+    """Derived driver features computed once and shared by every consumer"""
+
+    def __init__(self, data, features=None):
+        self.data = data
+        self.source_hash = source_fingerprint(data)
+        self.features = features if features is not None else compute_features(data)
+
+    @property
+    def version(self):
+        return f"v{FEATURE_STORE_VERSION}-{self.source_hash}"
+
+    def imputed(self, columns=MODEL_FEATURES):
+        """Mean-imputed feature matrix"""
+        return self.features[[f'imputed_{column}' for column in columns]].to_numpy()
+
+    def scaled(self, columns=MODEL_FEATURES):
+        """Mean-imputed, standard-scaled feature matrix"""
+        return self.features[[f'scaled_{column}' for column in columns]].to_numpy()
+
+    def join(self):
+        """Driver data with the derived features attached"""
+        return self.data.join(self.features)
+
+    def save(self, path):
+        """Write the features and a version stamp next to them"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stored = self.features.copy()
+        stored.insert(0, 'driver_id', self.data['driver_id'].to_numpy())
+        if path.suffix == '.parquet':
+            stored.to_parquet(path, index=False)
+        else:
+            stored.to_csv(path, index=False)
+        with open(f'{path}.version', 'w') as f:
+            json.dump({'version': self.version, 'rows': len(stored)}, f)
+        print(f"Features saved to {path}")
+
+    @classmethod
+    def load(cls, path, data):
+        """Load stored features for data, recomputing them if the store is stale"""
+        store = cls.__new__(cls)
+        store.data = data
+        store.source_hash = source_fingerprint(data)
+        try:
+            with open(f'{path}.version') as f:
+                stamp = json.load(f)
+            if stamp.get('version') != store.version:
+                raise ValueError("stale feature store")
+            path = Path(path)
+            stored = pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
+            store.features = stored.drop(columns='driver_id').astype('float32').set_index(data.index)
+        except (OSError, ValueError, KeyError):
+            store.features = compute_features(data)
+        return store
+
+def driver_features(driver_info):
+    """Features for a single driver record"""
+    return compute_features(pd.DataFrame([dict(driver_info)])).iloc[0]
@@ -1,17 +1,24 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.cluster import KMeans
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 from sklearn.metrics import confusion_matrix, classification_report, silhouette_score
-from sklearn.impute import SimpleImputer
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.functionalities.feature_store import FeatureStore, MODEL_FEATURES
+from src.functionalities.schema import load_driver_data
+
 class DriverBehaviorAnalyzer:
     def __init__(self):
         # Classification models
@@ -23,23 +30,19 @@ class DriverBehaviorAnalyzer:
         # Clustering model
         self.kmeans = KMeans(n_clusters=3, random_state=42)
         
-        self.scaler = StandardScaler()
-        self.imputer = SimpleImputer(strategy='mean')
         self.trained_models = {}
         self.feature_names = None
         
-    def prepare_data(self, data):
+    def prepare_data(self, data, feature_store=None):
         """Prepare data for analysis"""
-        features = [
-            'sudden_braking_events', 'speeding_events', 
-            'previous_accidents', 'traffic_fines',
-            'total_km', 'age', 'years_of_experience'
-        ]
+        features = list(MODEL_FEATURES)
         self.feature_names = features
+        if feature_store is None:
+            feature_store = FeatureStore(data)
         
         # Create binary target based on multiple risk factors
         # Calculate risk score from normalized features
-        risk_factors = data[['sudden_braking_events', 'speeding_events', 'previous_accidents', 'traffic_fines']]
+        risk_factors = data[['sudden_braking_events', 'speeding_events', 'previous_accidents', 'traffic_fines']].astype('float64')
         normalized_factors = (risk_factors - risk_factors.mean()) / risk_factors.std()
         risk_score = normalized_factors.mean(axis=1)
         
@@ -48,10 +51,9 @@ class DriverBehaviorAnalyzer:
         y = (risk_score > risk_threshold).astype(int)
         y = y.map({0: 'Safe', 1: 'Abnormal'})
         
-        # Prepare feature matrix
-        X = data[features]
-        X = self.imputer.fit_transform(X)
-        X_scaled = self.scaler.fit_transform(X)
+        # Imputed and scaled feature matrices from the shared feature store
+        X = feature_store.imputed(features)
+        X_scaled = feature_store.scaled(features)
         
         return X_scaled, X, y
     
@@ -229,7 +231,7 @@ class DriverBehaviorAnalyzer:
 def main():
     try:
         # Load data
-        data = pd.read_csv('data/driver_data_with_risks.csv')
+        data = load_driver_data('data/driver_data_with_risks.csv')
         
         # Initialize analyzer
         analyzer = DriverBehaviorAnalyzer()
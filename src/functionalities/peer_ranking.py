@@ -0,0 +1,79 @@
+import numpy as np
+
+# Peer percentiles of the behavior risk score. The pipeline publishes, for the
+# whole fleet and for every vehicle type, driving style and age band, the sorted
+# risk scores of the drivers in it; ranking a driver against a segment is then a
+# binary search instead of a sort of the fleet. Like the scoring engine, nothing
+# here imports pandas.
+
+PEER_DIMENSIONS = ['fleet', 'vehicle_type', 'driving_style', 'age_band']
+FLEET_SEGMENT = 'all'
+
+# Lower bounds of the age bands after the first, and the band labels; the
+# first band starts at the youngest age validation accepts (MIN_AGE)
+AGE_BAND_EDGES = [25, 35, 50, 65]
+AGE_BANDS = ['16-24', '25-34', '35-49', '50-64', '65+']
+
+# Scores are stored as float32, which ranks a million-driver fleet in 4 MB
+PEER_SCORE_DTYPE = np.dtype('<f4')
+
+def age_bands(ages):
+    """Age band label of each age"""
+    return np.asarray(AGE_BANDS, dtype=object)[np.searchsorted(AGE_BAND_EDGES, np.asarray(ages), side='right')]
+
+def driver_segments(info):
+    """(dimension, segment) pairs a driver is ranked within, from its driver info"""
+    segments = [('fleet', FLEET_SEGMENT)]
+    for dimension in ['vehicle_type', 'driving_style']:
+        if info.get(dimension):
+            segments.append((dimension, info[dimension]))
+    if info.get('age') is not None:
+        segments.append(('age_band', age_bands([info['age']])[0]))
+    return segments
+
+def build_peer_distributions(risk_scores, vehicle_types, driving_styles, ages):
+    """
+    Sorted risk scores per peer segment as records for the portal database:
+    dimension, segment, driver_count and risk_scores (the scores as float32
+    bytes, ascending). Drivers without a risk score are left out.
+    """
+    risk_scores = np.asarray(risk_scores, dtype='float64')
+    scored = ~np.isnan(risk_scores)
+    scores = risk_scores[scored].astype(PEER_SCORE_DTYPE)
+    labels = {
+        'vehicle_type': np.asarray(vehicle_types, dtype=object)[scored],
+        'driving_style': np.asarray(driving_styles, dtype=object)[scored],
+        'age_band': age_bands(np.asarray(ages)[scored])
+    }
+
+    # One sort of the fleet; selecting a segment's drivers from it keeps them sorted
+    order = np.argsort(scores)
+    sorted_scores = scores[order]
+    records = [_peer_record('fleet', FLEET_SEGMENT, sorted_scores)]
+    for dimension, values in labels.items():
+        segments, codes = np.unique(values.astype(str), return_inverse=True)
+        codes = codes[order]
+        for number, segment in enumerate(segments):
+            records.append(_peer_record(dimension, str(segment), sorted_scores[codes == number]))
+    return records
+
+def _peer_record(dimension, segment, sorted_scores):
+    return {
+        'dimension': dimension,
+        'segment': segment,
+        'driver_count': len(sorted_scores),
+        'risk_scores': np.ascontiguousarray(sorted_scores, dtype=PEER_SCORE_DTYPE).tobytes()
+    }
+
+def decode_peer_scores(blob):
+    """Sorted risk scores of a published segment, as a read-only array over the stored bytes"""
+    return np.frombuffer(blob, dtype=PEER_SCORE_DTYPE)
+
+def safer_than(sorted_scores, risk_scores):
+    """Percentage of a segment's drivers with a higher risk score than each given score, by binary search"""
+    if not len(sorted_scores):
+        return np.full(np.shape(risk_scores), np.nan)
+    # Compared at the stored precision, so a driver never counts as riskier than itself
+    scores = np.asarray(risk_scores, dtype='float64').astype(PEER_SCORE_DTYPE)
+    higher = len(sorted_scores) - np.searchsorted(sorted_scores, scores, side='right')
+    return higher * 100.0 / len(sorted_scores)
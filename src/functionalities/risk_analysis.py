@@ -1,26 +1,26 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import numpy as np
 from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.impute import SimpleImputer
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.functionalities.feature_store import FeatureStore, RISK_FEATURES
+from src.functionalities.schema import RISK_CATEGORIES, RISK_SCHEMA, load_driver_data
 
 class RiskAnalyzer:
-    def __init__(self, data):
+    def __init__(self, data, feature_store=None):
         self.data = data
-        self.scaler = StandardScaler()
-        self.imputer = SimpleImputer(strategy='mean')
+        self.feature_store = feature_store if feature_store is not None else FeatureStore(data)
         self.kmeans = None
         
     def preprocess_data(self):
-        """Preprocess data by handling missing values and scaling"""
-        features = ['sudden_braking_events', 'speeding_events', 
-                   'previous_accidents', 'traffic_fines', 'total_km']
-        
-        # Handle missing values
-        X = self.imputer.fit_transform(self.data[features])
-        
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        """Mean-imputed, scaled features from the shared feature store"""
+        features = list(RISK_FEATURES)
+        X_scaled = self.feature_store.scaled(features)
         
         return X_scaled, features
     
@@ -33,11 +33,11 @@ class RiskAnalyzer:
         clusters = self.kmeans.fit_predict(X_scaled)
         
         # Add cluster labels to the original dataframe
-        self.data['risk_cluster'] = clusters
+        self.data['risk_cluster'] = clusters.astype(RISK_SCHEMA['risk_cluster'])
         
         # Map clusters to risk categories based on centroid values
         centroids = self.kmeans.cluster_centers_
-        risk_levels = ['Low', 'Moderate', 'High']
+        risk_levels = RISK_CATEGORIES
         
         # Calculate average risk score for each cluster
         cluster_risks = []
@@ -50,32 +50,39 @@ class RiskAnalyzer:
         cluster_mapping = {cluster: risk for (cluster, _), risk in zip(cluster_risks, risk_levels)}
         
         # Map cluster numbers to risk levels
-        self.data['risk_category'] = self.data['risk_cluster'].map(cluster_mapping)
+        self.data['risk_category'] = self.data['risk_cluster'].map(cluster_mapping).astype(RISK_SCHEMA['risk_category'])
         
         return self.data
     
     def calculate_risk_metrics(self):
         """Calculate additional risk metrics"""
-        # Calculate normalized risk scores for each feature
-        self.data['braking_risk'] = self.data['sudden_braking_events'] / self.data['total_km'] * 1000
-        self.data['speeding_risk'] = self.data['speeding_events'] / self.data['total_km'] * 1000
+        # Normalized risk scores for each feature (events per 1000km)
+        braking_risk = self.feature_store.features['braking_per_1000km'].astype('float64')
+        speeding_risk = self.feature_store.features['speeding_per_1000km'].astype('float64')
         
         # Calculate experience factor (higher experience reduces risk)
-        self.data['experience_factor'] = 1 - (self.data['years_of_experience'] / self.data['years_of_experience'].max())
+        experience = self.data['years_of_experience'].astype('float64')
+        experience_factor = 1 - (experience / experience.max())
         
         # Calculate comprehensive risk score
-        self.data['comprehensive_risk_score'] = (
-            self.data['braking_risk'] * 0.25 +
-            self.data['speeding_risk'] * 0.25 +
-            self.data['previous_accidents'] * 0.3 +
-            self.data['experience_factor'] * 0.2
+        comprehensive_risk_score = (
+            braking_risk * 0.25 +
+            speeding_risk * 0.25 +
+            self.data['previous_accidents'].astype('float64') * 0.3 +
+            experience_factor * 0.2
         )
         
+        # Computed in float64, stored with the compact risk schema
+        self.data['braking_risk'] = braking_risk.astype(RISK_SCHEMA['braking_risk'])
+        self.data['speeding_risk'] = speeding_risk.astype(RISK_SCHEMA['speeding_risk'])
+        self.data['experience_factor'] = experience_factor.astype(RISK_SCHEMA['experience_factor'])
+        self.data['comprehensive_risk_score'] = comprehensive_risk_score.astype(RISK_SCHEMA['comprehensive_risk_score'])
+        
         return self.data
     
     def get_risk_summary(self):
         """Generate summary statistics for risk categories"""
-        summary = self.data.groupby('risk_category').agg({
+        summary = self.data.groupby('risk_category', observed=True).agg({
             'comprehensive_risk_score': ['mean', 'count'],
             'previous_accidents': 'mean',
             'total_km': 'mean'
@@ -86,7 +93,7 @@ class RiskAnalyzer:
 def main():
     # Load sample data
     try:
-        data = pd.read_csv('data/driver_data.csv')
+        data = load_driver_data('data/driver_data.csv')
         
         # Initialize and run risk analysis
         analyzer = RiskAnalyzer(data)
@@ -0,0 +1,71 @@
+import pandas as pd
+
+DRIVING_STYLES = ['conservative', 'moderate', 'aggressive']
+VEHICLE_TYPES = ['sedan', 'suv', 'sports', 'compact']
+RISK_CATEGORIES = ['Low', 'Moderate', 'High']
+
+# Compact in-memory dtypes for driver data: categoricals for labels, nullable
+# small integers for counts (telemetry can be missing) and float32 for measures.
+# Distances are shown to drivers and priced, so they keep float64 precision
+DRIVER_SCHEMA = {
+    'driver_id': 'int32',
+    'age': 'int8',
+    'driving_style': pd.CategoricalDtype(DRIVING_STYLES),
+    'vehicle_type': pd.CategoricalDtype(VEHICLE_TYPES),
+    'years_of_experience': 'int8',
+    'total_km': 'float64',
+    'sudden_braking_events': 'Int16',
+    'speeding_events': 'Int16',
+    'previous_accidents': 'Int8',
+    'traffic_fines': 'Int8',
+    'data_date': 'category'
+}
+
+# Columns added by the risk analysis stage
+RISK_SCHEMA = {
+    'risk_cluster': 'int8',
+    'risk_category': pd.CategoricalDtype(RISK_CATEGORIES, ordered=True),
+    'braking_risk': 'float32',
+    'speeding_risk': 'float32',
+    'experience_factor': 'float32',
+    'comprehensive_risk_score': 'float32'
+}
+
+# Columns of the premium calculation output; premiums stay float64
+PREMIUM_SCHEMA = {
+    'monthly_km': 'float64',
+    'risk_score': 'float32',
+    'behavior_weight': 'float32',
+    'recommended_model': 'category'
+}
+
+SCHEMA = {**DRIVER_SCHEMA, **RISK_SCHEMA, **PREMIUM_SCHEMA}
+
+# Counts are read as floats first because the CSV stores them as e.g. "56.0"
+READ_DTYPES = {
+    column: ('float32' if str(dtype).startswith('Int') else dtype)
+    for column, dtype in SCHEMA.items()
+}
+
+def apply_schema(data):
+    """Cast the known columns of a driver frame to their compact dtypes"""
+    for column, dtype in SCHEMA.items():
+        if column in data.columns and data[column].dtype != dtype:
+            data[column] = data[column].astype(dtype)
+    return data
+
+def load_driver_data(path):
+    """Load a driver data file (CSV or Parquet) with the compact schema"""
+    path = str(path)
+    if path.endswith('.parquet'):
+        data = pd.read_parquet(path)
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        data = pd.read_csv(path, dtype={c: t for c, t in READ_DTYPES.items() if c in header})
+    return apply_schema(data)
+
+def to_python(value):
+    """Convert a value from a typed frame into a plain Python scalar"""
+    if pd.isna(value):
+        return float('nan')
+    return value.item() if hasattr(value, 'item') else value
@@ -0,0 +1,290 @@
+import numpy as np
+
+# Scoring engine shared by the portal, the pipeline and the scoring API. Every
+# function takes scalars for one driver or arrays (NumPy or pandas columns) for a
+# fleet, and returns NumPy results of the same shape; nothing here imports pandas.
+
+# UIB models by behavior risk score: below 0.3, below 0.6, and the rest
+UIB_MODELS = ['Pay-As-You-Drive', 'Pay-How-You-Drive', 'Manage-How-You-Drive']
+UIB_RISK_THRESHOLDS = [0.3, 0.6]
+# Coverage plans offered for the same risk tiers on the standalone recommendation page
+COVERAGE_PLANS = ['Premium', 'Standard', 'Basic']
+
+MODEL_FEATURES = {
+    "Pay-As-You-Drive": [
+        "Pay based on actual kilometers driven",
+        "Lower premiums for less driving",
+        "Ideal for occasional drivers",
+        "Monthly distance tracking",
+        "Flexible payment options"
+    ],
+    "Pay-How-You-Drive": [
+        "Premium based on driving behavior",
+        "Rewards for safe driving habits",
+        "Real-time feedback on driving patterns",
+        "Monthly behavior assessment",
+        "Personalized driving tips"
+    ],
+    "Manage-How-You-Drive": [
+        "Active risk management",
+        "Intensive driving behavior monitoring",
+        "Regular safety coaching",
+        "Incident alerts and analysis",
+        "Mandatory safety workshops"
+    ],
+    "Premium": [
+        "Highest coverage for safe drivers",
+        "Rewards for consistent safe driving",
+        "Personal accident cover up to ₹15 lakhs",
+        "Zero depreciation cover",
+        "24/7 roadside assistance"
+    ],
+    "Standard": [
+        "Balanced coverage for average risk drivers",
+        "Personal accident cover up to ₹10 lakhs",
+        "Basic roadside assistance",
+        "Partial zero depreciation cover",
+        "Optional add-ons available"
+    ],
+    "Basic": [
+        "Essential coverage for high-risk drivers",
+        "Personal accident cover up to ₹5 lakhs",
+        "Basic third-party liability",
+        "Optional roadside assistance",
+        "Mandatory coverage features"
+    ]
+}
+
+# Typical events per 100km for each driving style, used when telemetry is missing
+STYLE_EVENT_FILL = {
+    'sudden_braking_events': {'conservative': 1.25, 'moderate': 2.75, 'aggressive': 5.0},
+    'speeding_events': {'conservative': 0.9, 'moderate': 2.0, 'aggressive': 4.25}
+}
+
+# Weights and caps of the behavior risk score shown in the portal
+BEHAVIOR_WEIGHTS = {
+    'sudden_braking_events': 0.25,
+    'speeding_events': 0.25,
+    'previous_accidents': 0.3,
+    'traffic_fines': 0.2
+}
+BEHAVIOR_MAX_VALUES = {
+    'sudden_braking_events': 100,
+    'speeding_events': 100,
+    'previous_accidents': 3,
+    'traffic_fines': 3
+}
+
+# Monthly premium the cost-benefit estimates are relative to (in Rupees)
+BASE_MONTHLY_PREMIUM = 5000
+
+# Suitability multipliers per driving style for PAYD, PHYD and MHYD
+STYLE_SUITABILITY = {
+    'conservative': {'payd': 1.1, 'phyd': 1.2, 'mhyd': 0.8},
+    'moderate': {'payd': 1.0, 'phyd': 1.0, 'mhyd': 1.0},
+    'aggressive': {'payd': 0.8, 'phyd': 0.8, 'mhyd': 1.2}
+}
+
+# Base annual premium for different vehicle types (in Rupees)
+VEHICLE_BASE_PREMIUMS = {'sedan': 25000, 'suv': 30000, 'sports': 40000, 'compact': 20000}
+
+# Distance brackets (monthly km upper bounds) and their PAYD factors
+DISTANCE_BRACKETS = {
+    500: {'factor': 0.7, 'description': 'Very Low Usage'},
+    1000: {'factor': 0.85, 'description': 'Low Usage'},
+    1500: {'factor': 1.0, 'description': 'Average Usage'},
+    2000: {'factor': 1.2, 'description': 'High Usage'},
+    float('inf'): {'factor': 1.4, 'description': 'Very High Usage'}
+}
+_BRACKET_BOUNDS = list(DISTANCE_BRACKETS)[:-1]
+_BRACKET_FACTORS = np.array([info['factor'] for info in DISTANCE_BRACKETS.values()])
+
+# PHYD behavior weight adjustment per driving style
+STYLE_WEIGHT_ADJUSTMENTS = {'conservative': -0.2, 'moderate': 0, 'aggressive': 0.3}
+
+def _values(values):
+    """Float64 view of a scalar or column, with missing values (None, NA) as NaN"""
+    return np.asarray(values, dtype='float64')
+
+def _lookup(labels, table, default=np.nan):
+    """Per-label value from table for a label or an array of labels"""
+    labels = np.asarray(labels)
+    if labels.ndim == 0:
+        return np.float64(table.get(labels.item(), default))
+    result = np.full(labels.shape, default, dtype='float64')
+    for label, value in table.items():
+        result[labels == label] = value
+    return result
+
+def _round(values, decimals=2):
+    """Round like Python's round(): np.round, with near-ties re-rounded exactly from their binary value"""
+    rounded = np.round(values, decimals)
+    scaled = np.abs(np.asarray(values) * 10 ** decimals)
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded = np.atleast_1d(rounded)
+        rounded[np.atleast_1d(ties)] = [round(float(value), decimals) for value in np.atleast_1d(values)[np.atleast_1d(ties)]]
+        rounded = rounded.reshape(np.shape(values))
+    return rounded
+
+def behavior_risk_scores(sudden_braking_events, speeding_events, previous_accidents, traffic_fines):
+    """Behavior risk score: weighted, capped ratios with missing values contributing nothing"""
+    score = 0.0
+    for column, values in zip(BEHAVIOR_WEIGHTS, [sudden_braking_events, speeding_events,
+                                                 previous_accidents, traffic_fines]):
+        normalized = np.minimum(_values(values) / BEHAVIOR_MAX_VALUES[column], 1)
+        score = score + np.where(np.isnan(normalized), 0, normalized) * BEHAVIOR_WEIGHTS[column]
+    return score
+
+def event_rates(total_km, sudden_braking_events, speeding_events, driving_style):
+    """
+    Braking and speeding events per 100km, imputed from the driving style where
+    telemetry is missing, and zero for drivers without distance.
+    """
+    total_km = _values(total_km)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        km_factor = np.where(total_km > 0, 100 / total_km, 0.0)
+    rates = []
+    for column, events in [('sudden_braking_events', sudden_braking_events), ('speeding_events', speeding_events)]:
+        events = _values(events)
+        fill = _lookup(driving_style, STYLE_EVENT_FILL[column], STYLE_EVENT_FILL[column]['aggressive'])
+        rates.append(np.where(np.isnan(events), fill, events) * km_factor)
+    return tuple(rates)
+
+def recommendation_tiers(risk_scores):
+    """Risk tier (0, 1 or 2) of each behavior risk score"""
+    return np.searchsorted(UIB_RISK_THRESHOLDS, _values(risk_scores), side='right')
+
+def recommend_uib_models(risk_scores, plans=UIB_MODELS):
+    """Recommended model (from plans, one per tier) for each behavior risk score"""
+    return np.asarray(plans, dtype=object)[recommendation_tiers(risk_scores)]
+
+def suitability_scores(risk_scores, monthly_distance, driving_style):
+    """Suitability (0-100) of PAYD, PHYD and MHYD for each driver, along the last axis"""
+    risk_scores = _values(risk_scores)
+    payd = np.clip((1 - (_values(monthly_distance) / 3000)) * 100, 0, 100)  # Higher score for lower distance
+    phyd = (1 - risk_scores) * 100  # Higher score for lower risk
+    mhyd = risk_scores * 100  # Higher score for higher risk
+    modifiers = [_lookup(driving_style, {style: modifier[model] for style, modifier in STYLE_SUITABILITY.items()}, 1.0)
+                 for model in ['payd', 'phyd', 'mhyd']]
+    return np.minimum(np.stack([payd * modifiers[0], phyd * modifiers[1], mhyd * modifiers[2]], axis=-1), 100)
+
+def monthly_premium_estimates(total_km, risk_scores):
+    """Estimated monthly PAYD, PHYD and MHYD premiums along the last axis; savings are BASE_MONTHLY_PREMIUM minus these"""
+    distance_factor = _values(total_km) / 12 / 1000  # per 1000 km a month
+    risk_scores = _values(risk_scores)
+    return BASE_MONTHLY_PREMIUM * np.stack([
+        0.7 + (distance_factor * 0.1),
+        0.8 + (risk_scores * 0.4),
+        0.9 + (risk_scores * 0.6)
+    ], axis=-1)
+
+def distance_brackets(total_km):
+    """Monthly km and DISTANCE_BRACKETS position of each driver's distance"""
+    monthly_km = _values(total_km) / 30
+    return monthly_km, np.searchsorted(_BRACKET_BOUNDS, monthly_km, side='left')
+
+def premium_risk_scores(braking_per_100km, speeding_per_100km, previous_accidents, traffic_fines):
+    """Risk components of the premium calculation, each capped at 2, and their weighted total"""
+    braking_risk = np.minimum(2.0, _values(braking_per_100km) / 5)
+    speeding_risk = np.minimum(2.0, _values(speeding_per_100km) / 5)
+    accident_risk = np.minimum(2.0, _values(previous_accidents) * 0.67)
+    fine_risk = np.minimum(2.0, _values(traffic_fines) * 0.5)
+    risk_score = braking_risk * 0.3 + speeding_risk * 0.3 + accident_risk * 0.25 + fine_risk * 0.15
+    return {
+        'braking_risk': _round(braking_risk, 2),
+        'speeding_risk': _round(speeding_risk, 2),
+        'accident_risk': _round(accident_risk, 2),
+        'fine_risk': _round(fine_risk, 2),
+        'total_risk_score': _round(risk_score, 2)
+    }
+
+def behavior_weights(driving_style, years_of_experience, age, total_risk_scores):
+    """PHYD behavior weight, adjusted for style, experience, age and risk, kept within [0.6, 1.8]"""
+    years_of_experience = _values(years_of_experience)
+    age = _values(age)
+    experience_factor = np.select([years_of_experience < 3, years_of_experience < 10], [0.2, 0.1], 0)
+    age_factor = np.select([age < 25, age > 65], [0.2, 0.1], 0)
+    weight = (
+        1.0 +
+        _lookup(driving_style, STYLE_WEIGHT_ADJUSTMENTS) +
+        experience_factor +
+        age_factor +
+        (_values(total_risk_scores) - 1) * 0.2  # Risk score adjustment
+    )
+    return _round(np.clip(weight, 0.6, 1.8), 2)
+
+def premiums(vehicle_type, driving_style, total_km, braking_per_100km, speeding_per_100km,
+             previous_accidents, traffic_fines, years_of_experience, age, base_premiums=VEHICLE_BASE_PREMIUMS):
+    """Annual PAYD and PHYD premiums with the factors they are built from"""
+    base_premium = _lookup(vehicle_type, base_premiums)
+    monthly_km, bracket = distance_brackets(total_km)
+    risk_scores = premium_risk_scores(braking_per_100km, speeding_per_100km, previous_accidents, traffic_fines)
+    behavior_weight = behavior_weights(driving_style, years_of_experience, age, risk_scores['total_risk_score'])
+    return {
+        'base_premium': base_premium,
+        'monthly_km': _round(monthly_km, 2),
+        'distance_bracket': bracket,
+        'distance_factor': _BRACKET_FACTORS[bracket],
+        **risk_scores,
+        'behavior_weight': behavior_weight,
+        'payd_premium': _round(base_premium * _BRACKET_FACTORS[bracket], 2),
+        'phyd_premium': _round(base_premium * behavior_weight, 2)
+    }
+
+def score_drivers(drivers):
+    """
+    Behavior risk score, recommended UIB model, model suitability, estimated monthly
+    premiums and savings, and annual PAYD/PHYD premiums in one vectorized pass.
+
+    drivers maps the driver data columns to values: a DataFrame or dict of
+    columns for a fleet, or one driver's record. Precomputed feature-store
+    columns (behavior_risk_score, braking/speeding_per_100km) are used when present.
+    """
+    if 'braking_per_100km' in drivers:
+        braking, speeding = drivers['braking_per_100km'], drivers['speeding_per_100km']
+    else:
+        braking, speeding = event_rates(drivers['total_km'], drivers['sudden_braking_events'],
+                                        drivers['speeding_events'], drivers['driving_style'])
+    if 'behavior_risk_score' in drivers:
+        risk_scores = _values(drivers['behavior_risk_score'])
+    else:
+        risk_scores = behavior_risk_scores(drivers['sudden_braking_events'], drivers['speeding_events'],
+                                           drivers['previous_accidents'], drivers['traffic_fines'])
+    estimates = monthly_premium_estimates(drivers['total_km'], risk_scores)
+    return {
+        'risk_score': risk_scores,
+        'recommended_uib_model': recommend_uib_models(risk_scores),
+        'suitability': suitability_scores(risk_scores, _values(drivers['total_km']) / 12, drivers['driving_style']),
+        'monthly_premiums': estimates,
+        'monthly_savings': BASE_MONTHLY_PREMIUM - estimates,
+        'premiums': premiums(drivers['vehicle_type'], drivers['driving_style'], drivers['total_km'], braking, speeding,
+                             drivers['previous_accidents'], drivers['traffic_fines'],
+                             drivers['years_of_experience'], drivers['age'])
+    }
+
+# One-driver forms used by the portal pages
+
+def calculate_risk_score(driver_info):
+    """Calculate a risk score based on driving behavior"""
+    # Precomputed by the feature store when the driver record comes from it
+    if 'behavior_risk_score' in driver_info:
+        return driver_info['behavior_risk_score']
+    return float(behavior_risk_scores(driver_info['sudden_braking_events'], driver_info['speeding_events'],
+                                      driver_info['previous_accidents'], driver_info['traffic_fines']))
+
+def get_model_recommendation(risk_score, total_km, driving_style, plans=UIB_MODELS):
+    """Get the recommended model (from plans, one per risk tier) and its features"""
+    recommendation = plans[int(recommendation_tiers(risk_score))]
+    return recommendation, MODEL_FEATURES[recommendation]
+
+def model_suitability(risk_score, monthly_distance, driving_style):
+    """Suitability (0-100) of each UIB model for a driver"""
+    return dict(zip(UIB_MODELS, suitability_scores(risk_score, monthly_distance, driving_style).tolist()))
+
+def estimate_monthly_premiums(total_km, risk_score):
+    """Estimated monthly premium and saving against the base premium for each UIB model"""
+    return {
+        model: {"monthly_premium": premium, "monthly_savings": BASE_MONTHLY_PREMIUM - premium}
+        for model, premium in zip(UIB_MODELS, monthly_premium_estimates(total_km, risk_score).tolist())
+    }
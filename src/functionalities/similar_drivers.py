@@ -0,0 +1,117 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.functionalities.feature_store import RISK_FEATURES
+from src.lru_cache import LRUCache
+
+project_root = Path(__file__).parent.parent.parent
+SIMILAR_DRIVERS_FILE = 'similar_drivers.joblib'
+DEFAULT_INDEX_PATH = project_root / 'src' / 'data' / SIMILAR_DRIVERS_FILE
+INDEX_LEAF_SIZE = 40
+
+# Loaded indexes keyed by path and file version; only the current file is kept mapped
+_shared_indexes = LRUCache(1)
+
+class SimilarDriverIndex:
+    """
+    KD-tree over the drivers' scaled risk features (the feature space of
+    RiskAnalyzer.preprocess_data), for the nearest neighbours of a driver in the
+    book or of a prospect's raw features. sklearn and joblib are imported on
+    first use, so importing this module stays cheap for the portal.
+    """
+    def __init__(self, driver_ids, tree, means, stds, features=RISK_FEATURES):
+        self.driver_ids = driver_ids  # Ascending, row i of the tree is driver_ids[i]
+        self.tree = tree
+        self.means = means
+        self.stds = stds
+        self.features = list(features)
+
+    @classmethod
+    def build(cls, driver_ids, scaled, imputed, features=RISK_FEATURES, leaf_size=INDEX_LEAF_SIZE):
+        """
+        Index the scaled feature matrix of the given drivers; the mean and
+        standard deviation of the imputed features let raw prospect features be
+        scaled the same way.
+        """
+        from sklearn.neighbors import KDTree
+
+        order = np.argsort(np.asarray(driver_ids), kind='stable')
+        imputed = np.asarray(imputed, dtype='float64')
+        stds = imputed.std(axis=0)
+        return cls(
+            np.asarray(driver_ids, dtype='int64')[order],
+            KDTree(np.asarray(scaled, dtype='float64')[order], leaf_size=leaf_size),
+            imputed.mean(axis=0),
+            np.where(stds > 0, stds, 1.0),
+            features
+        )
+
+    def save(self, path):
+        """Write the index for memory-mapping, replacing any previous file atomically"""
+        import joblib
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + '.partial')
+        joblib.dump({
+            'features': self.features,
+            'driver_ids': self.driver_ids,
+            'tree': self.tree,
+            'means': self.means,
+            'stds': self.stds
+        }, partial)
+        # Portals still mapping the previous file keep reading it until they reload
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index with its arrays memory-mapped, so processes share one copy in the page cache"""
+        import joblib
+
+        state = joblib.load(path, mmap_mode='r')
+        return cls(state['driver_ids'], state['tree'], state['means'], state['stds'], state['features'])
+
+    @classmethod
+    def shared(cls, path=DEFAULT_INDEX_PATH):
+        """The process-wide index for path, reloaded when the pipeline replaces the file, or None if missing"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+        return _shared_indexes.get_or_build(key, lambda: cls.load(path))
+
+    def __len__(self):
+        return len(self.driver_ids)
+
+    def _row(self, driver_id):
+        row = np.searchsorted(self.driver_ids, int(driver_id))
+        if row < len(self.driver_ids) and self.driver_ids[row] == int(driver_id):
+            return row
+        return None
+
+    def neighbors(self, driver_id, k):
+        """
+        IDs and distances of the k drivers most like driver_id, nearest first,
+        or None if the driver is not in the index.
+        """
+        row = self._row(driver_id)
+        if row is None:
+            return None
+        points = self.tree.get_arrays()[0]
+        distances, rows = self.tree.query(points[row:row + 1], k=min(k + 1, len(self)))
+        distances, rows = distances[0], rows[0]
+        # The driver is its own nearest neighbour, unless tied with identical drivers
+        keep = rows != row
+        if keep.all():
+            keep[-1] = False
+        return self.driver_ids[rows[keep]], distances[keep]
+
+    def lookalikes(self, features, k):
+        """IDs and distances of the k drivers most like a raw feature profile, e.g. a prospect's; missing values count as average"""
+        values = np.array([features.get(name, np.nan) for name in self.features], dtype='float64')
+        scaled = np.where(np.isnan(values), 0.0, (values - self.means) / self.stds)
+        distances, rows = self.tree.query(scaled[np.newaxis, :], k=min(k, len(self)))
+        return self.driver_ids[rows[0]], distances[0]
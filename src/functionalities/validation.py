@@ -0,0 +1,156 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.functionalities.schema import DRIVING_STYLES, VEHICLE_TYPES, apply_schema
+
+REQUIRED_COLUMNS = [
+    'driver_id', 'age', 'driving_style', 'vehicle_type', 'years_of_experience',
+    'license_number', 'license_plate', 'total_km', 'sudden_braking_events',
+    'speeding_events', 'previous_accidents', 'traffic_fines', 'data_date'
+]
+NUMERIC_COLUMNS = [
+    'driver_id', 'age', 'years_of_experience', 'total_km', 'sudden_braking_events',
+    'speeding_events', 'previous_accidents', 'traffic_fines'
+]
+# Telemetry counts may be missing; every other numeric column is required
+OPTIONAL_COLUMNS = ['sudden_braking_events', 'speeding_events']
+COUNT_COLUMNS = ['sudden_braking_events', 'speeding_events', 'previous_accidents', 'traffic_fines']
+
+MIN_AGE = 16
+MAX_AGE = 100
+# Largest values the compact schema can hold
+MAX_COUNT = {'sudden_braking_events': 32767, 'speeding_events': 32767,
+             'previous_accidents': 127, 'traffic_fines': 127}
+
+def _check_columns(data):
+    """Raise a ValueError naming any required columns the data lacks"""
+    missing = [column for column in REQUIRED_COLUMNS if column not in data.columns]
+    if missing:
+        raise ValueError(f"Driver data is missing required columns: {', '.join(missing)}")
+
+def _coerce_numeric(data):
+    """Numeric views of the numeric columns, with unparseable values as NaN"""
+    return {column: pd.to_numeric(data[column], errors='coerce').astype('float64')
+            for column in NUMERIC_COLUMNS}
+
+def find_violations(data, seen_ids=None, values=None):
+    """Evaluate every rule column-wise, returning a boolean frame of violations"""
+    _check_columns(data)
+    if values is None:
+        values = _coerce_numeric(data)
+    checks = {}
+
+    def flag(rule, failed):
+        checks[rule] = checks[rule] | failed if rule in checks else failed
+
+    # Required numbers must be present, and anything present must parse
+    for column in NUMERIC_COLUMNS:
+        raw_missing = data[column].isna().to_numpy()
+        if column not in OPTIONAL_COLUMNS:
+            flag(f'missing_{column}', raw_missing)
+        flag(f'invalid_{column}', np.isnan(values[column].to_numpy()) & ~raw_missing)
+
+    driver_id = values['driver_id']
+    flag('invalid_driver_id', ((driver_id <= 0) | (driver_id % 1 > 0) | (driver_id > 2**31 - 1)).to_numpy())
+    duplicated = driver_id.duplicated(keep='first').to_numpy().copy()
+    if seen_ids is not None and len(seen_ids):
+        duplicated |= np.isin(driver_id.to_numpy(), seen_ids)
+    flag('duplicate_driver_id', duplicated)
+
+    age = values['age']
+    experience = values['years_of_experience']
+    flag('invalid_age', ((age < MIN_AGE) | (age > MAX_AGE) | (age % 1 > 0)).to_numpy())
+    flag('invalid_years_of_experience', ((experience < 0) | (experience > age) | (experience % 1 > 0)).to_numpy())
+
+    # Zero distance would divide by zero in the per-km risk rates
+    total_km = values['total_km']
+    flag('non_positive_total_km', (total_km <= 0).to_numpy())
+    flag('invalid_total_km', np.isinf(total_km.to_numpy()))
+
+    for column in COUNT_COLUMNS:
+        count = values[column]
+        flag(f'invalid_{column}', ((count < 0) | (count % 1 > 0) | (count > MAX_COUNT[column])).to_numpy())
+
+    # Unknown labels would raise KeyError in the premium and behavior lookups
+    flag('unknown_driving_style', ~data['driving_style'].isin(DRIVING_STYLES).to_numpy())
+    flag('unknown_vehicle_type', ~data['vehicle_type'].isin(VEHICLE_TYPES).to_numpy())
+
+    for column in ['license_number', 'license_plate']:
+        text = data[column].astype(str).str.strip()
+        flag(f'missing_{column}', (data[column].isna() | (text == '')).to_numpy())
+
+    flag('invalid_data_date', pd.to_datetime(data['data_date'], errors='coerce', format='%Y-%m-%d').isna().to_numpy())
+
+    return pd.DataFrame(checks, index=data.index)
+
+def rejection_reasons(violations):
+    """Semicolon-separated names of the rules each row violates"""
+    reasons = pd.Series('', index=violations.index, dtype=object)
+    for rule in violations.columns:
+        failed = violations[rule].to_numpy()
+        if failed.any():
+            reasons[failed] = reasons[failed] + rule + ';'
+    return reasons.str.rstrip(';')
+
+def validate_driver_data(data, seen_ids=None):
+    """Split raw driver data into typed clean rows and quarantined rows with reasons"""
+    _check_columns(data)
+    values = _coerce_numeric(data)
+    violations = find_violations(data, seen_ids, values)
+    bad = violations.any(axis=1).to_numpy()
+
+    quarantine = data[bad].copy()
+    quarantine['rejection_reason'] = rejection_reasons(violations[bad])
+
+    clean = data[~bad].copy()
+    for column, numeric in values.items():
+        clean[column] = numeric[~bad]
+    clean['data_date'] = clean['data_date'].astype(str)
+    return apply_schema(clean).reset_index(drop=True), quarantine
+
+def _write_chunk(data, path, first):
+    """Append a chunk to a CSV file, writing the header with the first chunk"""
+    data.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+
+def validate_file(input_path, clean_path, quarantine_path, chunk_size=500000):
+    """Validate a driver data file in chunks, writing clean and quarantined rows"""
+    input_path, clean_path, quarantine_path = Path(input_path), Path(clean_path), Path(quarantine_path)
+    clean_path.parent.mkdir(parents=True, exist_ok=True)
+    quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if input_path.suffix == '.parquet':
+        chunks = [pd.read_parquet(input_path)]
+    else:
+        chunks = pd.read_csv(input_path, chunksize=chunk_size)
+
+    seen_ids = np.empty(0)
+    clean_parts = []
+    totals = {'rows': 0, 'clean': 0, 'quarantined': 0}
+
+    for index, chunk in enumerate(chunks):
+        clean, quarantine = validate_driver_data(chunk, seen_ids)
+        seen_ids = np.concatenate([seen_ids, clean['driver_id'].to_numpy(dtype='float64')])
+
+        if clean_path.suffix == '.parquet':
+            clean_parts.append(clean)
+        else:
+            _write_chunk(clean, clean_path, index == 0)
+        _write_chunk(quarantine, quarantine_path, index == 0)
+
+        totals['rows'] += len(chunk)
+        totals['clean'] += len(clean)
+        totals['quarantined'] += len(quarantine)
+
+    if clean_path.suffix == '.parquet':
+        pd.concat(clean_parts, ignore_index=True).to_parquet(clean_path, index=False)
+
+    print(f"Validated {totals['rows']} rows: {totals['clean']} clean, "
+          f"{totals['quarantined']} quarantined to {quarantine_path}")
+    return totals
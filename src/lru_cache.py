@@ -0,0 +1,54 @@
+from collections import OrderedDict
+import threading
+
+class LRUCache:
+    """Size-bounded, thread-safe LRU cache of built values, shared by every session or request in the process"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """The value cached under key, or None"""
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        """
+        The value cached under key, building it with build() on a miss.
+
+        Keys carry the version of the data the value was built from (e.g.
+        (driver_id, data_version)), so a value is built once per data refresh.
+        A key of None bypasses the cache.
+        """
+        if key is None:
+            return build()
+        value = self.get(key)
+        if value is None:
+            # Built outside the lock; two callers racing on the same key just build it twice
+            value = build()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self):
+        return len(self._values)
@@ -1,52 +1,393 @@
+import argparse
+import hashlib
+import json
 import os
-from functionalities.data_generator import DriverDataGenerator
-from functionalities.risk_analysis import RiskAnalyzer
-from functionalities.ml_models import DriverBehaviorAnalyzer
-from functionalities.insurance_models import PremiumCalculator
-
-def ensure_directory():
-    """Ensure required directories exist"""
-    directories = ['data', 'data/ml_results', 'data/sample_data']
-    for directory in directories:
-        os.makedirs(directory, exist_ok=True)
-
-def main():
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.functionalities.data_generator import DriverDataGenerator
+from src.functionalities.feature_store import FeatureStore
+from src.functionalities.schema import load_driver_data
+from src.functionalities.validation import validate_file
+from src.functionalities.risk_analysis import RiskAnalyzer
+from src.functionalities.ml_models import DriverBehaviorAnalyzer
+from src.functionalities.insurance_models import PremiumCalculator
+from src.functionalities.scoring import recommend_uib_models
+from src.functionalities.peer_ranking import AGE_BANDS, PEER_DIMENSIONS, build_peer_distributions
+from src.functionalities.similar_drivers import INDEX_LEAF_SIZE, SIMILAR_DRIVERS_FILE, SimilarDriverIndex
+from database.db_manager import DEFAULT_DB_URL, create_portal_engine
+from database.scores import SCORE_COLUMNS, publish_driver_scores, published_scores_version
+from src.pipeline_stages import STAGES
+
+DEFAULT_DATA_DIR = project_root / 'src' / 'data'
+OUTPUT_FORMATS = ['csv', 'parquet']
+MANIFEST_NAME = 'pipeline_manifest.json'
+ML_PLOTS = [
+    'confusion_matrices.png',
+    'feature_importance.png',
+    'risk_distribution.png',
+    'model_performance.png',
+    'cluster_characteristics.png'
+]
+
+def parse_args(argv=None):
+    """Parse pipeline command-line options"""
+    parser = argparse.ArgumentParser(
+        description="Run the driver risk analysis pipeline."
+    )
+    parser.add_argument('--num-drivers', type=int, default=100,
+                        help="Number of drivers to generate (default: 100)")
+    parser.add_argument('--source', choices=['generate', 'file'], default='generate',
+                        help="Generate synthetic data or read an existing driver data file")
+    parser.add_argument('--input', default=None,
+                        help="Driver data file to use with --source file")
+    parser.add_argument('--data-dir', default=str(DEFAULT_DATA_DIR),
+                        help="Directory for pipeline outputs (default: src/data)")
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help="Drivers per chunk for generation and premium calculation")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for chunked stages (default: 1)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help="Output format for tabular results (default: csv)")
+    parser.add_argument('--db-url', default=DEFAULT_DB_URL,
+                        help="Portal database the publish stage writes driver scores to")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"Comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Random seed for reproducible data generation")
+    parser.add_argument('--force', action='store_true',
+                        help="Run selected stages even if their outputs are cached")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Print the planned stages and cache hits without running them")
+    args = parser.parse_args(argv)
+
+    args.stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    if args.source == 'file':
+        if not args.input:
+            parser.error("--source file requires --input")
+        args.stages = [stage for stage in args.stages if stage != 'generate']
+    if args.num_drivers < 1 or args.chunk_size < 1 or args.workers < 1:
+        parser.error("--num-drivers, --chunk-size and --workers must be positive")
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet requires the optional 'pyarrow' package")
+    return args
+
+def read_frame(path):
+    """Read a CSV or Parquet table with the compact driver schema"""
+    return load_driver_data(path)
+
+def write_frame(data, path):
+    """Write a CSV or Parquet table based on its extension"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write next to the target and rename, so readers such as the portal never see a partial file
+    partial = path.with_name(f".{path.name}.partial")
+    if path.suffix == '.parquet':
+        data.to_parquet(partial, index=False)
+    else:
+        data.to_csv(partial, index=False)
+    os.replace(partial, path)
+    print(f"Data saved to {path}")
+
+def stage_specs(args):
+    """Describe the inputs, outputs and parameters of every stage"""
+    data_dir = Path(args.data_dir)
+    ext = args.format
+    if args.source == 'file':
+        driver_data = Path(args.input)
+    else:
+        driver_data = data_dir / f'driver_data.{ext}'
+    clean_data = data_dir / f'driver_data_clean.{ext}'
+    quarantine = data_dir / 'driver_data_quarantine.csv'
+    features = data_dir / f'driver_features.{ext}'
+    with_risks = data_dir / f'driver_data_with_risks.{ext}'
+    premiums = data_dir / f'premium_calculations.{ext}'
+
+    return {
+        'generate': {
+            'inputs': [],
+            'outputs': [driver_data],
+            # Each chunk is seeded from the run's seed, so the chunking shapes the data too
+            'params': {'num_drivers': args.num_drivers, 'seed': args.seed, 'chunk_size': args.chunk_size}
+        },
+        'validate': {
+            'inputs': [driver_data],
+            'outputs': [clean_data, quarantine],
+            'params': {}
+        },
+        'features': {
+            'inputs': [clean_data],
+            'outputs': [features],
+            'params': {}
+        },
+        'risk': {
+            'inputs': [clean_data, features],
+            'outputs': [with_risks],
+            'params': {}
+        },
+        'ml': {
+            'inputs': [with_risks, features],
+            'outputs': [data_dir / 'ml_results' / name for name in ML_PLOTS],
+            'params': {}
+        },
+        'premiums': {
+            'inputs': [with_risks, features],
+            'outputs': [premiums],
+            'params': {}
+        },
+        'similar': {
+            'inputs': [with_risks, features],
+            'outputs': [data_dir / SIMILAR_DRIVERS_FILE],
+            'params': {'leaf_size': INDEX_LEAF_SIZE}
+        },
+        'publish': {
+            'inputs': [with_risks, features, premiums],
+            'outputs': [],
+            # A changed scores table or set of peer segments means the rows must be published again
+            'params': {'db_url': args.db_url, 'columns': SCORE_COLUMNS, 'peer_dimensions': PEER_DIMENSIONS,
+                       'age_bands': AGE_BANDS}
+        }
+    }
+
+def load_manifest(data_dir):
+    """Load the record of previously completed stages"""
+    try:
+        with open(Path(data_dir) / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(data_dir, manifest):
+    """Persist the record of completed stages"""
+    Path(data_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(data_dir) / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def stage_fingerprint(stage, spec):
+    """Fingerprint a stage from its parameters, the state of its inputs and, for publish, the scores it published"""
+    inputs = []
+    for path in spec['inputs']:
+        stat = path.stat() if path.exists() else None
+        inputs.append([str(path), stat.st_size if stat else None, stat.st_mtime_ns if stat else None])
+    payload = {'stage': stage, 'params': spec['params'], 'inputs': inputs}
+    if stage == 'publish':
+        # The portal database can be recreated or wiped without the manifest knowing
+        engine = create_portal_engine(spec['params']['db_url'])
+        try:
+            payload['published'] = published_scores_version(engine)
+        finally:
+            engine.dispose()
+    payload = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def plan_stages(args, manifest):
+    """Work out which selected stages will run and which are cache hits"""
+    specs = stage_specs(args)
+    produced_by_running = set()
+    plan = []
+
+    for stage in STAGES:
+        if stage not in args.stages:
+            continue
+        spec = specs[stage]
+        cached = (
+            not args.force
+            and all(path.exists() for path in spec['outputs'])
+            and not any(path in produced_by_running for path in spec['inputs'])
+            and manifest.get(stage) == stage_fingerprint(stage, spec)
+        )
+        if not cached:
+            produced_by_running.update(spec['outputs'])
+        plan.append({'stage': stage, 'cached': cached, **spec})
+
+    return plan
+
+def print_plan(plan, args):
+    """Print the planned stages with their cache status"""
+    print(f"Planned stages (data dir: {args.data_dir}):")
+    for step in plan:
+        status = 'cached' if step['cached'] else 'run'
+        outputs = ', '.join(path.name for path in step['outputs']) or step['params'].get('db_url', '')
+        print(f"  {step['stage']:<10} {status:<7} -> {outputs}")
+    if not plan:
+        print("  (no stages selected)")
+
+def _map_chunks(func, tasks, workers):
+    """Apply func to each task, in worker processes when requested"""
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, tasks))
+    return [func(task) for task in tasks]
+
+def _generate_chunk(task):
+    """Generate one chunk of drivers with an independent random stream"""
+    start_id, count, seed = task
+    if seed is None:
+        np.random.seed()
+        random.seed()
+    else:
+        np.random.seed((seed + start_id) % 2**32)
+        random.seed(seed + start_id)
+    generator = DriverDataGenerator(num_drivers=count)
+    return generator.generate_driver_data(start_id=start_id)
+
+def _premiums_chunk(task):
+    """Calculate premiums for one chunk of drivers"""
+    chunk, features = task
+    feature_store = FeatureStore(chunk, features=features)
+    return PremiumCalculator(data=chunk, feature_store=feature_store).calculate_all_premiums()
+
+def run_generate(step, args):
+    tasks = [
+        (start, min(args.chunk_size, args.num_drivers - start + 1), args.seed)
+        for start in range(1, args.num_drivers + 1, args.chunk_size)
+    ]
+    driver_data = pd.concat(_map_chunks(_generate_chunk, tasks, args.workers), ignore_index=True)
+    write_frame(driver_data, step['outputs'][0])
+
+def run_validate(step, args):
+    validate_file(step['inputs'][0], step['outputs'][0], step['outputs'][1], chunk_size=args.chunk_size)
+
+def run_features(step, args):
+    driver_data = read_frame(step['inputs'][0])
+    FeatureStore(driver_data).save(step['outputs'][0])
+
+def run_risk(step, args):
+    driver_data = read_frame(step['inputs'][0])
+    feature_store = FeatureStore.load(step['inputs'][1], driver_data)
+    risk_analyzer = RiskAnalyzer(driver_data, feature_store)
+    risk_analyzer.cluster_drivers()
+    data_with_metrics = risk_analyzer.calculate_risk_metrics()
+    write_frame(data_with_metrics, step['outputs'][0])
+
+def run_ml(step, args):
+    data_with_metrics = read_frame(step['inputs'][0])
+    feature_store = FeatureStore.load(step['inputs'][1], data_with_metrics)
+    behavior_analyzer = DriverBehaviorAnalyzer()
+    X_scaled, X_original, y = behavior_analyzer.prepare_data(data_with_metrics, feature_store)
+    classification_results = behavior_analyzer.train_classifiers(X_scaled, y)
+    clustering_results = behavior_analyzer.perform_clustering(X_scaled, data_with_metrics)
+    save_path = f"{step['outputs'][0].parent}/"
+    behavior_analyzer.plot_results(classification_results, clustering_results, save_path=save_path)
+
+def run_premiums(step, args):
+    data_with_metrics = read_frame(step['inputs'][0])
+    features = FeatureStore.load(step['inputs'][1], data_with_metrics).features
+    chunks = [
+        (data_with_metrics.iloc[start:start + args.chunk_size], features.iloc[start:start + args.chunk_size])
+        for start in range(0, len(data_with_metrics), args.chunk_size)
+    ]
+    premium_results = pd.concat(_map_chunks(_premiums_chunk, chunks, args.workers), ignore_index=True)
+    write_frame(premium_results, step['outputs'][0])
+
+def run_similar(step, args):
+    data_with_metrics = read_frame(step['inputs'][0])
+    feature_store = FeatureStore.load(step['inputs'][1], data_with_metrics)
+    X_scaled, features = RiskAnalyzer(data_with_metrics, feature_store).preprocess_data()
+    index = SimilarDriverIndex.build(data_with_metrics['driver_id'].to_numpy(), X_scaled,
+                                     feature_store.imputed(features), features)
+    index.save(step['outputs'][0])
+    print(f"Indexed {len(index)} drivers")
+
+def _driver_scores(data_with_metrics, features, premium_results):
+    """One row per driver with everything the portal shows about its scoring"""
+    scores = data_with_metrics[['driver_id', 'vehicle_type', 'driving_style', 'risk_cluster', 'risk_category',
+                                'braking_risk', 'speeding_risk', 'experience_factor', 'previous_accidents',
+                                'comprehensive_risk_score']].copy()
+    scores['behavior_risk_score'] = features['behavior_risk_score'].to_numpy()
+    scores['recommended_uib_model'] = recommend_uib_models(scores['behavior_risk_score'])
+    premium_columns = premium_results[['driver_id', 'monthly_km', 'risk_score', 'behavior_weight',
+                                       'payd_premium', 'phyd_premium', 'recommended_model']].rename(
+        columns={'risk_score': 'premium_risk_score', 'recommended_model': 'recommended_premium_model'})
+    return scores.merge(premium_columns, on='driver_id', how='left')
+
+def run_publish(step, args):
+    with_risks, features_path, premiums = step['inputs']
+    data_with_metrics = read_frame(with_risks)
+    features = FeatureStore.load(features_path, data_with_metrics).features
+    scores = _driver_scores(data_with_metrics, features, read_frame(premiums))
+    peers = build_peer_distributions(scores['behavior_risk_score'], scores['vehicle_type'],
+                                     scores['driving_style'], data_with_metrics['age'])
+    engine = create_portal_engine(args.db_url)
+    try:
+        publish_driver_scores(engine, scores, stage_fingerprint('publish', step)[:16], peers)
+    finally:
+        engine.dispose()
+
+STAGE_RUNNERS = {
+    'generate': run_generate,
+    'validate': run_validate,
+    'features': run_features,
+    'risk': run_risk,
+    'ml': run_ml,
+    'premiums': run_premiums,
+    'similar': run_similar,
+    'publish': run_publish
+}
+
+STAGE_TITLES = {
+    'generate': "Generating driver data",
+    'validate': "Validating driver data",
+    'features': "Computing shared driver features",
+    'risk': "Analyzing driver risks",
+    'ml': "Training ML models",
+    'premiums': "Calculating insurance premiums",
+    'similar': "Building the similar-driver index",
+    'publish': "Publishing driver scores to the portal database"
+}
+
+def run_pipeline(args, on_stage=None):
+    """Run the planned stages, calling on_stage(stage, completed, total) before each"""
+    manifest = load_manifest(args.data_dir)
+    plan = plan_stages(args, manifest)
+
+    for number, step in enumerate(plan, start=1):
+        stage = step['stage']
+        if on_stage is not None:
+            on_stage(stage, number - 1, len(plan))
+        if step['cached']:
+            print(f"\n{number}. {STAGE_TITLES[stage]}... cached, skipping")
+            continue
+        print(f"\n{number}. {STAGE_TITLES[stage]}...")
+        STAGE_RUNNERS[stage](step, args)
+        manifest[stage] = stage_fingerprint(stage, step)
+        save_manifest(args.data_dir, manifest)
+
+    return plan
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.dry_run:
+        print_plan(plan_stages(args, load_manifest(args.data_dir)), args)
+        return 0
+
     print("Starting Driver Risk Analysis Pipeline...")
-    
+
     try:
-        # Step 1: Generate synthetic driver data
-        print("\n1. Generating driver data...")
-        generator = DriverDataGenerator(num_drivers=100)
-        driver_data = generator.generate_driver_data()
-        generator.save_to_csv(driver_data, 'data/driver_data.csv')
-        
-        # Step 2: Perform risk analysis
-        print("\n2. Analyzing driver risks...")
-        risk_analyzer = RiskAnalyzer(driver_data)
-        data_with_risks = risk_analyzer.cluster_drivers()
-        data_with_metrics = risk_analyzer.calculate_risk_metrics()
-        data_with_metrics.to_csv('data/driver_data_with_risks.csv', index=False)
-        
-        # Step 3: Train ML models and analyze behavior
-        print("\n3. Training ML models...")
-        behavior_analyzer = DriverBehaviorAnalyzer()
-        X_scaled, X_original, y = behavior_analyzer.prepare_data(data_with_metrics)
-        classification_results = behavior_analyzer.train_classifiers(X_scaled, y)
-        clustering_results = behavior_analyzer.perform_clustering(X_scaled, data_with_metrics)
-        behavior_analyzer.plot_results(classification_results, clustering_results)
-        
-        # Step 4: Calculate insurance premiums
-        print("\n4. Calculating insurance premiums...")
-        premium_calculator = PremiumCalculator('data/driver_data_with_risks.csv')
-        premium_results = premium_calculator.calculate_all_premiums()
-        premium_results.to_csv('data/premium_calculations.csv', index=False)
-        
+        run_pipeline(args)
         print("\nAnalysis pipeline completed successfully!")
-        print("Results have been saved to the 'data' directory.")
-        
+        print(f"Results have been saved to '{args.data_dir}'.")
+        return 0
+
     except Exception as e:
         print(f"Error: {str(e)}")
+        return 1
 
 if __name__ == "__main__":
-    ensure_directory()
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 import sys
@@ -9,62 +8,29 @@ import sys
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-def calculate_risk_score(driver_info):
-    """Calculate a risk score based on driving behavior"""
-    # Normalize and weight different factors
-    weights = {
-        'sudden_braking_events': 0.25,
-        'speeding_events': 0.25,
-        'previous_accidents': 0.3,
-        'traffic_fines': 0.2
-    }
-    
-    max_values = {
-        'sudden_braking_events': 100,
-        'speeding_events': 100,
-        'previous_accidents': 3,
-        'traffic_fines': 3
-    }
-    
-    score = 0
-    for factor, weight in weights.items():
-        if pd.notna(driver_info[factor]):
-            normalized_value = min(driver_info[factor] / max_values[factor], 1)
-            score += normalized_value * weight
-    
-    return score
+from src.functionalities.scoring import (MODEL_FEATURES, calculate_risk_score, estimate_monthly_premiums,
+                                         get_model_recommendation, model_suitability)
+from src.functionalities.peer_ranking import decode_peer_scores, driver_segments, safer_than
+from src.functionalities.similar_drivers import SimilarDriverIndex
+from src.figure_cache import figure_cache
+from src.lru_cache import LRUCache
 
-def get_model_recommendation(risk_score, total_km, driving_style):
-    """Get UIB model recommendation based on driving patterns"""
-    if risk_score < 0.3:
-        base_recommendation = "Pay-As-You-Drive"
-        features = [
-            "Pay based on actual kilometers driven",
-            "Lower premiums for less driving",
-            "Ideal for occasional drivers",
-            "Monthly distance tracking",
-            "Flexible payment options"
-        ]
-    elif risk_score < 0.6:
-        base_recommendation = "Pay-How-You-Drive"
-        features = [
-            "Premium based on driving behavior",
-            "Rewards for safe driving habits",
-            "Real-time feedback on driving patterns",
-            "Monthly behavior assessment",
-            "Personalized driving tips"
-        ]
-    else:
-        base_recommendation = "Manage-How-You-Drive"
-        features = [
-            "Active risk management",
-            "Intensive driving behavior monitoring",
-            "Regular safety coaching",
-            "Incident alerts and analysis",
-            "Mandatory safety workshops"
-        ]
-    
-    return base_recommendation, features
+# Decoded peer distributions keyed by (dimension, segment, data_version); one
+# published version's segments fit, shared by every portal session
+PEER_CACHE_SIZE = 16
+peer_cache = LRUCache(PEER_CACHE_SIZE)
+PEER_LABELS = {
+    'fleet': "all drivers",
+    'vehicle_type': "{} drivers",
+    'driving_style': "{} drivers",
+    'age_band': "drivers aged {}"
+}
+# Nearest drivers whose premiums are compared with a driver's own
+SIMILAR_DRIVERS = 50
+
+def _chart_key(chart, cache_key):
+    """Figure cache key for one chart of a driver, from (driver_id, data_version)"""
+    return None if cache_key is None else (chart, *cache_key)
 
 def show_model_comparison(driver_risk_score):
     """Show interactive UIB model comparison"""
@@ -108,8 +74,8 @@ def show_model_comparison(driver_risk_score):
     st.subheader("UIB Model Comparison")
     st.dataframe(df_models.set_index('Feature'), use_container_width=True)
 
-def create_risk_gauge(risk_score):
-    """Create a gauge chart for risk score"""
+def risk_gauge_figure(risk_score):
+    """Gauge chart figure for a risk score"""
     fig = go.Figure(go.Indicator(
         mode = "gauge+number",
         value = risk_score * 100,
@@ -131,10 +97,91 @@ def create_risk_gauge(risk_score):
         }
     ))
     
+    return fig
+
+def create_risk_gauge(risk_score, cache_key=None):
+    """Create a gauge chart for risk score"""
+    fig = figure_cache.get_or_build(_chart_key('risk_gauge', cache_key),
+                                    lambda: risk_gauge_figure(risk_score))
     st.plotly_chart(fig)
 
-def show_driving_patterns(driver_info):
-    """Show driving pattern visualizations"""
+def peer_percentiles(driver_info, risk_score, data_version):
+    """
+    (peer group, percentage of its drivers with a higher risk score) for each
+    peer segment of a driver, ranked against the distributions the pipeline
+    published with data_version. Segments not cached yet are fetched in one query.
+    """
+    from database.db_manager import get_db_manager
+    
+    segments = driver_segments(driver_info)
+    distributions = {segment: peer_cache.get((*segment, data_version)) for segment in segments}
+    missing = [segment for segment, scores in distributions.items() if scores is None]
+    if missing:
+        result = get_db_manager().get_peer_distributions(missing)
+        if not result["success"]:
+            return []
+        for segment, published in result["distributions"].items():
+            distributions[segment] = decode_peer_scores(published["risk_scores"])
+            peer_cache.put((*segment, data_version), distributions[segment])
+    
+    return [
+        (PEER_LABELS[dimension].format(segment), float(safer_than(distributions[(dimension, segment)], risk_score)))
+        for dimension, segment in segments
+        if distributions[(dimension, segment)] is not None
+    ]
+
+def show_peer_ranking(driver_info, risk_score, data_version):
+    """Show how a driver's risk score ranks among their peers"""
+    rankings = peer_percentiles(driver_info, risk_score, data_version)
+    if rankings:
+        st.subheader("Compared with Other Drivers")
+        for peers, share in rankings:
+            st.write(f"Safer than {share:.0f}% of {peers}")
+
+def phyd_peer_savings(driver_id):
+    """
+    What the drivers most like this one save a year on Pay-How-You-Drive over
+    Pay-As-You-Drive: how many were compared, how many chose PHYD, and the
+    average saving of those who did (of all of them while nobody has). None
+    without a similar-driver index or published scores.
+    """
+    from database.db_manager import get_db_manager
+    
+    index = SimilarDriverIndex.shared()
+    neighbors = index.neighbors(driver_id, SIMILAR_DRIVERS) if index is not None else None
+    if neighbors is None:
+        return None
+    db = get_db_manager()
+    profiles = db.get_driver_profiles(neighbors[0])
+    models = db.get_selected_models(neighbors[0])
+    if not (profiles["success"] and models["success"]):
+        return None
+    
+    savings = {
+        peer_id: profile["scores"]['payd_premium'] - profile["scores"]['phyd_premium']
+        for peer_id, profile in profiles["profiles"].items() if profile["scores"]
+    }
+    if not savings:
+        return None
+    switched = [saving for peer_id, saving in savings.items() if models["models"].get(peer_id) == "Pay-How-You-Drive"]
+    compared = switched or list(savings.values())
+    return {"peers": len(savings), "switched": len(switched), "saving": sum(compared) / len(compared)}
+
+def show_peer_savings(driver_id):
+    """Show what similar drivers save on Pay-How-You-Drive"""
+    savings = phyd_peer_savings(driver_id)
+    if savings is None:
+        return
+    amount = f"₹{abs(savings['saving']):,.0f} a year {'less' if savings['saving'] >= 0 else 'more'}"
+    if savings["switched"]:
+        st.info(f"👥 {savings['switched']} of the {savings['peers']} drivers most like you switched to "
+                f"Pay-How-You-Drive and pay {amount} than on Pay-As-You-Drive")
+    else:
+        st.info(f"👥 The {savings['peers']} drivers most like you would pay {amount} on Pay-How-You-Drive "
+                f"than on Pay-As-You-Drive")
+
+def driving_patterns_figure(driver_info):
+    """Radar chart figure of a driver's driving patterns"""
     # Prepare data for radar chart
     categories = ['Sudden Braking', 'Speeding', 'Accidents', 'Fines']
     values = [
@@ -161,10 +208,16 @@ def show_driving_patterns(driver_info):
         showlegend=False
     )
     
+    return fig
+
+def show_driving_patterns(driver_info, cache_key=None):
+    """Show driving pattern visualizations"""
+    fig = figure_cache.get_or_build(_chart_key('driving_patterns', cache_key),
+                                    lambda: driving_patterns_figure(driver_info))
     st.plotly_chart(fig)
 
-def create_score_breakdown(driver_info):
-    """Create an interactive bar chart showing score breakdown"""
+def score_breakdown_figure(driver_info):
+    """Bar chart figure of a driver's score breakdown"""
     categories = {
         'sudden_braking_events': 'Sudden Braking',
         'speeding_events': 'Speeding',
@@ -209,35 +262,19 @@ def create_score_breakdown(driver_info):
         height=400
     )
     
+    return fig
+
+def create_score_breakdown(driver_info, cache_key=None):
+    """Create an interactive bar chart showing score breakdown"""
+    fig = figure_cache.get_or_build(_chart_key('score_breakdown', cache_key),
+                                    lambda: score_breakdown_figure(driver_info))
     st.plotly_chart(fig)
 
-def create_model_suitability_chart(risk_score, monthly_distance, driving_style):
-    """Create an interactive chart showing suitability for each UIB model"""
-    
-    # Calculate suitability scores for each model
-    payd_score = (1 - (monthly_distance / 3000)) * 100  # Higher score for lower distance
-    payd_score = max(min(payd_score, 100), 0)  # Clamp between 0 and 100
-    
-    phyd_score = (1 - risk_score) * 100  # Higher score for lower risk
-    
-    mhyd_score = risk_score * 100  # Higher score for higher risk
-    
-    # Add driving style modifier
-    style_modifiers = {
-        'conservative': {'payd': 1.1, 'phyd': 1.2, 'mhyd': 0.8},
-        'moderate': {'payd': 1.0, 'phyd': 1.0, 'mhyd': 1.0},
-        'aggressive': {'payd': 0.8, 'phyd': 0.8, 'mhyd': 1.2}
-    }
-    
-    modifier = style_modifiers.get(driving_style, {'payd': 1.0, 'phyd': 1.0, 'mhyd': 1.0})
-    
-    payd_score *= modifier['payd']
-    phyd_score *= modifier['phyd']
-    mhyd_score *= modifier['mhyd']
-    
-    # Create suitability chart
-    models = ['Pay-As-You-Drive', 'Pay-How-You-Drive', 'Manage-How-You-Drive']
-    scores = [min(payd_score, 100), min(phyd_score, 100), min(mhyd_score, 100)]
+def model_suitability_figure(risk_score, monthly_distance, driving_style):
+    """Bar chart figure of the suitability of each UIB model"""
+    suitability = model_suitability(risk_score, monthly_distance, driving_style)
+    models = list(suitability)
+    scores = list(suitability.values())
     
     fig = go.Figure()
     
@@ -261,37 +298,20 @@ def create_model_suitability_chart(risk_score, monthly_distance, driving_style):
         height=400
     )
     
+    return fig
+
+def create_model_suitability_chart(risk_score, monthly_distance, driving_style, cache_key=None):
+    """Create an interactive chart showing suitability for each UIB model"""
+    fig = figure_cache.get_or_build(_chart_key('model_suitability', cache_key),
+                                    lambda: model_suitability_figure(risk_score, monthly_distance, driving_style))
     st.plotly_chart(fig)
 
-def create_cost_benefit_analysis(driver_info, risk_score):
-    """Create an interactive visualization for cost-benefit analysis"""
-    monthly_distance = driver_info['total_km'] / 12
-    
-    # Calculate estimated monthly premiums for each model
-    base_premium = 5000  # Base monthly premium
-    
-    # PAYD calculation
-    distance_factor = monthly_distance / 1000  # per 1000 km
-    payd_premium = base_premium * (0.7 + (distance_factor * 0.1))
-    
-    # PHYD calculation
-    behavior_factor = risk_score
-    phyd_premium = base_premium * (0.8 + (behavior_factor * 0.4))
-    
-    # MHYD calculation
-    risk_factor = risk_score
-    mhyd_premium = base_premium * (0.9 + (risk_factor * 0.6))
-    
-    # Create comparison chart
-    models = ['Pay-As-You-Drive', 'Pay-How-You-Drive', 'Manage-How-You-Drive']
-    premiums = [payd_premium, phyd_premium, mhyd_premium]
-    
-    # Calculate potential savings
-    savings = [
-        base_premium - payd_premium,
-        base_premium - phyd_premium,
-        base_premium - mhyd_premium
-    ]
+def cost_benefit_figure(driver_info, risk_score):
+    """Grouped bar chart figure of premiums and savings per UIB model"""
+    estimates = estimate_monthly_premiums(driver_info['total_km'], risk_score)
+    models = list(estimates)
+    premiums = [estimate['monthly_premium'] for estimate in estimates.values()]
+    savings = [estimate['monthly_savings'] for estimate in estimates.values()]
     
     fig = go.Figure()
     
@@ -322,8 +342,16 @@ def create_cost_benefit_analysis(driver_info, risk_score):
         height=400
     )
     
+    return fig
+
+def create_cost_benefit_analysis(driver_info, risk_score, cache_key=None):
+    """Create an interactive visualization for cost-benefit analysis"""
+    fig = figure_cache.get_or_build(_chart_key('cost_benefit', cache_key),
+                                    lambda: cost_benefit_figure(driver_info, risk_score))
     st.plotly_chart(fig)
 
+RECOMMENDATION_SECTIONS = ["Profile & Risk", "Score Analysis", "Model Comparison", "Cost Analysis"]
+
 def show_recommendations(driver_details):
     """Main function to show model recommendations"""
     st.title("UIB Model Recommendations")
@@ -334,17 +362,30 @@ def show_recommendations(driver_details):
     
     driver = driver_details["driver"]
     info = driver_details["additional_info"]
+    # Figures are built once per driver per data refresh and reused across reruns
+    cache_key = (driver.driver_id, driver_details.get("data_version"))
+    
+    scores = driver_details.get("scores")
+    if scores:
+        # Materialized by the pipeline, no need to recompute on every rerun
+        risk_score = scores['behavior_risk_score']
+        recommended_model = scores['recommended_uib_model']
+        features = MODEL_FEATURES[recommended_model]
+    else:
+        # Calculate risk score
+        risk_score = calculate_risk_score(info)
+        
+        # Get model recommendation
+        recommended_model, features = get_model_recommendation(risk_score, info['total_km'], info['driving_style'])
     
-    # Calculate risk score
-    risk_score = calculate_risk_score(info)
-    
-    # Get model recommendation
-    recommended_model, features = get_model_recommendation(risk_score, info['total_km'], info['driving_style'])
+    monthly_distance = info['total_km'] / 12
     
-    # Create tabs for different analyses
-    tabs = st.tabs(["Profile & Risk", "Score Analysis", "Model Comparison", "Cost Analysis"])
+    # Only the selected section is computed and sent to the browser; st.tabs would
+    # build the charts and tables of all four on every rerun
+    section = st.radio("Section", RECOMMENDATION_SECTIONS, horizontal=True,
+                       key="recommendation_section", label_visibility="collapsed")
     
-    with tabs[0]:
+    if section == "Profile & Risk":
         col1, col2 = st.columns(2)
         
         with col1:
@@ -353,8 +394,6 @@ def show_recommendations(driver_details):
             st.write(f"Vehicle Type: {info['vehicle_type'].title()}")
             st.write(f"Experience: {info['years_of_experience']} years")
             st.write(f"Total Distance: {info['total_km']:.2f} km")
-            
-            monthly_distance = info['total_km'] / 12
             st.write(f"Average Monthly Distance: {monthly_distance:.2f} km")
             
             if monthly_distance < 1000:
@@ -364,21 +403,25 @@ def show_recommendations(driver_details):
         
         with col2:
             st.header("Risk Assessment")
-            create_risk_gauge(risk_score)
+            create_risk_gauge(risk_score, cache_key)
+            if scores:
+                st.write(f"Risk Category: {scores['risk_category']}")
+                # Peer distributions are published with the scores
+                show_peer_ranking(info, risk_score, scores['data_version'])
             
             if info['driving_style'] == 'conservative':
                 st.success("👍 Conservative driving style is ideal for Pay-How-You-Drive benefits")
             elif info['driving_style'] == 'aggressive':
                 st.warning("⚠️ Aggressive driving style might benefit from Manage-How-You-Drive coaching")
     
-    with tabs[1]:
+    elif section == "Score Analysis":
         st.header("Detailed Score Analysis")
-        create_score_breakdown(info)
-        show_driving_patterns(info)
+        create_score_breakdown(info, cache_key)
+        show_driving_patterns(info, cache_key)
     
-    with tabs[2]:
+    elif section == "Model Comparison":
         st.header("Model Suitability Analysis")
-        create_model_suitability_chart(risk_score, monthly_distance, info['driving_style'])
+        create_model_suitability_chart(risk_score, monthly_distance, info['driving_style'], cache_key)
         
         st.header("Recommended UIB Model")
         st.subheader(f"🎯 {recommended_model}")
@@ -388,9 +431,16 @@ def show_recommendations(driver_details):
         
         show_model_comparison(risk_score)
     
-    with tabs[3]:
+    elif section == "Cost Analysis":
         st.header("Cost-Benefit Analysis")
-        create_cost_benefit_analysis(info, risk_score)
+        create_cost_benefit_analysis(info, risk_score, cache_key)
+        
+        if scores:
+            st.subheader("Your Quoted Annual Premiums")
+            col1, col2 = st.columns(2)
+            col1.metric("Pay-As-You-Drive", f"₹{scores['payd_premium']:,.0f}")
+            col2.metric("Pay-How-You-Drive", f"₹{scores['phyd_premium']:,.0f}")
+            show_peer_savings(driver.driver_id)
         
         st.info("""
         💡 The cost analysis is based on:
@@ -415,8 +465,8 @@ def show_recommendations(driver_details):
         """)
     
     if st.button("Confirm Model Selection"):
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
+        from database.db_manager import get_db_manager
+        db = get_db_manager()
         result = db.update_uib_model(driver.driver_id, selected_model)
         
         if result["success"]:
@@ -430,4 +480,4 @@ def show_recommendations(driver_details):
             else:
                 st.info("📅 We'll contact you to schedule your first driving assessment")
         else:
-            st.error("Failed to update model. Please try again.") 
\ No newline at end of file
+            st.error(f"Failed to update model: {result['error']}") 
\ No newline at end of file
@@ -0,0 +1,319 @@
+import streamlit as st
+import sys
+import os
+import hmac
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from dotenv import load_dotenv
+import pandas as pd
+import plotly.graph_objects as go
+from database.analytics import FLEET_CUBE_DIMENSIONS, FLEET_CUBE_MEASURES, NO_MODEL, RECOMMENDATION_MEASURES
+from src.pipeline_stages import STAGES
+from src.functionalities.schema import DRIVING_STYLES, VEHICLE_TYPES, RISK_CATEGORIES
+from src.functionalities.scoring import COVERAGE_PLANS, UIB_MODELS
+from src.functionalities.similar_drivers import SimilarDriverIndex
+
+load_dotenv()
+
+ANALYTICS_DIMENSIONS = {
+    'risk_category': ("Risk Category", RISK_CATEGORIES),
+    # The standalone recommendation page records coverage plans instead of UIB models
+    'selected_uib_model': ("Selected Model", UIB_MODELS + COVERAGE_PLANS + ["Not selected"]),
+    'vehicle_type': ("Vehicle Type", VEHICLE_TYPES),
+    'driving_style': ("Driving Style", DRIVING_STYLES)
+}
+
+# The database is opened on first use rather than on import, so the sign-in form
+# shows without waiting for it
+
+def get_db():
+    """Shared, process-wide database manager, created on first use"""
+    from database.db_manager import get_db_manager
+    return get_db_manager()
+
+@st.cache_resource(show_spinner=False)
+def get_queue():
+    """Pipeline job queue in the portal database, created once per process"""
+    from database.job_queue import JobQueue
+    return JobQueue(get_db().engine)
+
+def check_admin():
+    """Gate the admin tools behind the ADMIN_PASSWORD environment variable"""
+    if st.session_state.get('admin_authenticated'):
+        return True
+
+    expected = os.getenv('ADMIN_PASSWORD')
+    if not expected:
+        st.error("Admin access is disabled. Set ADMIN_PASSWORD to enable it.")
+        return False
+
+    password = st.text_input("Admin Password", type="password")
+    if st.button("Sign in"):
+        if hmac.compare_digest(password, expected):
+            st.session_state.admin_authenticated = True
+            st.rerun()
+        else:
+            st.error("Invalid admin password.")
+    return False
+
+def show_refresh_form():
+    st.header("Refresh Driver Scores")
+    st.info("Runs are queued and executed by the pipeline worker (python src/pipeline_worker.py).")
+
+    stages = st.multiselect("Stages", STAGES, default=STAGES)
+    num_drivers = st.number_input("Number of drivers to generate", min_value=1, value=100, step=100)
+    force = st.checkbox("Rerun cached stages")
+
+    if st.button("Queue Pipeline Run"):
+        if not stages:
+            st.warning("Please select at least one stage.")
+            return
+        options = {
+            'stages': ','.join(stage for stage in STAGES if stage in stages),
+            'num_drivers': int(num_drivers) if 'generate' in stages else None,
+            'force': force
+        }
+        result = get_queue().submit(options, requested_by='admin')
+        if not result["success"]:
+            st.error(result["error"])
+        elif result["deduplicated"]:
+            st.info(f"An identical run is already queued (job {result['job_id']}).")
+        else:
+            st.success(f"Queued pipeline run as job {result['job_id']}.")
+
+def show_jobs():
+    st.header("Pipeline Jobs")
+    if st.button("Refresh Status"):
+        st.rerun()
+
+    jobs = get_queue().list_jobs(limit=20)
+    if not jobs:
+        st.write("No pipeline runs yet.")
+        return
+
+    for job in jobs:
+        col1, col2, col3 = st.columns([2, 3, 1])
+        with col1:
+            st.write(f"**Job {job.id}** — {job.status}")
+            st.caption(f"Requested {job.created_at:%Y-%m-%d %H:%M}" + (f" by {job.requested_by}" if job.requested_by else ""))
+        with col2:
+            st.progress(job.progress or 0.0, text=job.message or job.current_stage or "")
+        with col3:
+            if job.status in ('pending', 'running') and not job.cancel_requested:
+                if st.button("Cancel", key=f"cancel_{job.id}"):
+                    result = get_queue().cancel(job.id)
+                    if result["success"]:
+                        st.rerun()
+                    st.error(result["error"])
+            elif job.cancel_requested and job.status == 'running':
+                st.write("Cancelling…")
+
+def show_fleet_onboarding():
+    st.header("Onboard Fleet")
+    st.info("Upload a CSV with license_plate, license_number and password columns to register many drivers at once.")
+
+    upload = st.file_uploader("Fleet CSV", type="csv")
+    if upload is not None and st.button("Register Drivers"):
+        fleet = pd.read_csv(upload, dtype=str)
+        missing = [column for column in ['license_plate', 'license_number', 'password'] if column not in fleet.columns]
+        if missing:
+            st.error(f"Missing columns: {', '.join(missing)}")
+            return
+        results = get_db().register_drivers_bulk(fleet[['license_plate', 'license_number', 'password']].to_dict('records'))
+        report = pd.DataFrame({
+            'license_plate': fleet['license_plate'],
+            'license_number': fleet['license_number'],
+            'registered': [result["success"] for result in results],
+            'driver_id': [result.get("driver_id") for result in results],
+            'error': [result.get("error") for result in results]
+        })
+        st.success(f"Registered {int(report['registered'].sum())} of {len(report)} drivers.")
+        st.dataframe(report[~report['registered']], use_container_width=True)
+        st.download_button("Download Results", report.to_csv(index=False), file_name="onboarding_results.csv")
+
+def ordered_segments(segments, dimension):
+    """Segments of a dimension in its usual order, followed by any others sorted"""
+    order = ANALYTICS_DIMENSIONS[dimension][1]
+    segments = set(segments)
+    return [segment for segment in order if segment in segments] + sorted(segments.difference(order))
+
+def cube_rollup(cells, by):
+    """Fleet cube cells summed along one dimension, in its usual order, with the averages they give"""
+    totals = cells.groupby(by)[FLEET_CUBE_MEASURES].sum()
+    totals = totals.reindex(ordered_segments(totals.index, by))
+    drivers = totals['driver_count']
+    summary = pd.DataFrame({
+        'Drivers': drivers,
+        'Avg Risk Score': totals['comprehensive_risk_sum'] / totals['comprehensive_risk_count'].where(lambda n: n > 0),
+        'Avg Behavior Risk': totals['behavior_risk_sum'] / drivers,
+        'Avg Previous Accidents': totals['previous_accidents_sum'] / drivers,
+        'Avg Monthly Km': totals['monthly_km_sum'] / drivers,
+        'Avg PAYD Premium': totals['payd_premium_sum'] / drivers,
+        'Avg PHYD Premium': totals['phyd_premium_sum'] / drivers,
+        'Avg Potential Savings': totals['premium_difference_sum'] / drivers
+    }).round(2)
+    for model, measure in zip(UIB_MODELS, RECOMMENDATION_MEASURES):
+        summary[f"Recommended {model}"] = totals[measure]
+    return summary.rename_axis(ANALYTICS_DIMENSIONS[by][0])
+
+def show_fleet_analytics():
+    st.header("Fleet Analytics")
+    result = get_db().get_fleet_cube()
+    if not result["success"]:
+        st.error(result["error"])
+        return
+    if not result["cells"]:
+        st.write("No fleet analytics yet. Run the pipeline's publish stage to build them.")
+        return
+
+    # The cube has one row per combination of the four dimensions, so slicing and
+    # rolling it up never touches the per-driver tables
+    cells = pd.DataFrame(result["cells"])
+    cells['selected_uib_model'] = cells['selected_uib_model'].replace(NO_MODEL, "Not selected")
+    # Filters offer the segments the cube holds, whatever model names drivers chose
+    options = {dimension: ordered_segments(cells[dimension].unique(), dimension) for dimension in FLEET_CUBE_DIMENSIONS}
+    columns = st.columns(len(FLEET_CUBE_DIMENSIONS))
+    for dimension, column in zip(FLEET_CUBE_DIMENSIONS, columns):
+        label = ANALYTICS_DIMENSIONS[dimension][0]
+        selected = column.multiselect(label, options[dimension], key=f"analytics_{dimension}")
+        if selected:
+            cells = cells[cells[dimension].isin(selected)]
+    if cells.empty:
+        st.write("No scored drivers match these filters.")
+        return
+
+    totals = cells[FLEET_CUBE_MEASURES].sum()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Drivers", f"{int(totals['driver_count']):,}")
+    if totals['comprehensive_risk_count']:
+        col2.metric("Avg Risk Score", f"{totals['comprehensive_risk_sum'] / totals['comprehensive_risk_count']:.2f}")
+    col3.metric("Avg Potential Savings", f"₹{totals['premium_difference_sum'] / totals['driver_count']:,.0f}")
+    chosen = cells.loc[cells['selected_uib_model'] != "Not selected", 'driver_count'].sum()
+    col4.metric("Chose a Model", f"{chosen * 100 / totals['driver_count']:.0f}%")
+
+    by = st.selectbox("Break down by", FLEET_CUBE_DIMENSIONS, format_func=lambda name: ANALYTICS_DIMENSIONS[name][0])
+    summary = cube_rollup(cells, by)
+    st.dataframe(summary, use_container_width=True)
+
+    label = ANALYTICS_DIMENSIONS[by][0]
+    fig = go.Figure([
+        go.Bar(name=model, x=summary.index, y=summary[f"Recommended {model}"]) for model in UIB_MODELS
+    ])
+    fig.update_layout(title=f"Recommended UIB Models by {label}", barmode='stack', xaxis_title=label,
+                      yaxis_title="Drivers")
+    st.plotly_chart(fig)
+
+    fig = go.Figure([
+        go.Bar(name="Pay-As-You-Drive", x=summary.index, y=summary['Avg PAYD Premium']),
+        go.Bar(name="Pay-How-You-Drive", x=summary.index, y=summary['Avg PHYD Premium'])
+    ])
+    fig.update_layout(title=f"Average Annual Premiums by {label}", barmode='group', xaxis_title=label,
+                      yaxis_title="Premium (₹)")
+    st.plotly_chart(fig)
+    if result["data_version"]:
+        st.caption(f"Built from scores version {result['data_version']}, updated as drivers choose models.")
+
+def show_fleet():
+    st.header("Fleet")
+    col1, col2, col3, col4 = st.columns(4)
+    filters = {
+        'risk_category': col1.multiselect("Risk Category", RISK_CATEGORIES),
+        'selected_uib_model': col2.multiselect("Selected Model", UIB_MODELS),
+        'vehicle_type': col3.multiselect("Vehicle Type", VEHICLE_TYPES),
+        'driving_style': col4.multiselect("Driving Style", DRIVING_STYLES)
+    }
+    filters = {name: values for name, values in filters.items() if values}
+    highest_risk_first = st.radio("Order", ["Highest risk first", "Lowest risk first"], horizontal=True) == "Highest risk first"
+    
+    # Cursors of the pages visited so far, reset whenever the query changes
+    query_key = (tuple(sorted((name, tuple(values)) for name, values in filters.items())), highest_risk_first)
+    if st.session_state.get('fleet_query') != query_key:
+        st.session_state.fleet_query = query_key
+        st.session_state.fleet_cursors = [None]
+    cursors = st.session_state.fleet_cursors
+    
+    result = get_db().query_fleet(highest_risk_first=highest_risk_first, after=cursors[-1], **filters)
+    if not result["success"]:
+        st.error(result["error"])
+        return
+    if not result["drivers"]:
+        st.write("No scored drivers match these filters. Run the pipeline's publish stage to score drivers.")
+    else:
+        st.dataframe(pd.DataFrame(result["drivers"]), use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns(2)
+    if len(cursors) > 1 and col1.button("Previous Page"):
+        cursors.pop()
+        st.rerun()
+    if result["next_cursor"] is not None and col2.button("Next Page"):
+        cursors.append(result["next_cursor"])
+        st.rerun()
+    st.caption(f"Page {len(cursors)}")
+
+def show_similar_drivers():
+    st.header("Similar Drivers")
+    index = SimilarDriverIndex.shared()
+    if index is None:
+        st.write("No similar-driver index yet. Run the pipeline's similar stage to build one.")
+        return
+
+    source = st.radio("Find drivers like", ["A driver in the book", "A prospect"], horizontal=True)
+    count = st.slider("Lookalikes", min_value=5, max_value=100, value=20)
+    if source == "A driver in the book":
+        driver_id = st.number_input("Driver ID", min_value=1, step=1)
+        neighbors = index.neighbors(int(driver_id), count)
+        if neighbors is None:
+            st.warning(f"Driver {driver_id} is not in the index.")
+            return
+    else:
+        # Starts from the fleet average of every feature
+        columns = st.columns(len(index.features))
+        profile = {
+            feature: column.number_input(feature.replace('_', ' ').title(), min_value=0.0, value=float(mean))
+            for feature, column, mean in zip(index.features, columns, index.means)
+        }
+        neighbors = index.lookalikes(profile, count)
+
+    driver_ids, distances = neighbors
+    result = get_db().get_driver_profiles(driver_ids)
+    if not result["success"]:
+        st.error(result["error"])
+        return
+    rows = []
+    for driver_id, distance in zip(driver_ids, distances):
+        profile = result["profiles"].get(int(driver_id))
+        if profile is None:
+            continue
+        info, scores = profile["additional_info"], profile["scores"] or {}
+        rows.append({
+            'driver_id': int(driver_id),
+            'distance': round(float(distance), 3),
+            'vehicle_type': info['vehicle_type'],
+            'driving_style': info['driving_style'],
+            'risk_category': scores.get('risk_category'),
+            'behavior_risk_score': info['behavior_risk_score'],
+            'recommended_uib_model': scores.get('recommended_uib_model'),
+            'payd_premium': scores.get('payd_premium'),
+            'phyd_premium': scores.get('phyd_premium')
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def admin_page():
+    st.title("Driver Portal Admin")
+
+    if not check_admin():
+        return
+
+    show_refresh_form()
+    show_jobs()
+    show_fleet_analytics()
+    show_fleet()
+    show_similar_drivers()
+    show_fleet_onboarding()
+
+if __name__ == "__main__":
+    admin_page()
@@ -1,6 +1,7 @@
 import streamlit as st
 import sys
 import os
+import threading
 from pathlib import Path
 from datetime import datetime
 
@@ -8,13 +9,30 @@ from datetime import datetime
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
-# Import after adding to path
-from database.db_manager import DatabaseManager
-from src.model_recommendation import show_recommendations, create_risk_gauge, show_driving_patterns
 import time
 
-# Initialize database manager
-db = DatabaseManager()
+# The database layer, pandas and Plotly are imported on first use rather than here,
+# so a fresh process can serve the login form before they have loaded
+
+def get_db():
+    """Shared, process-wide database manager, created on first use"""
+    from database.db_manager import get_db_manager
+    return get_db_manager()
+
+def _warm_up():
+    """Open the database and load the dashboard's modules while the login form is shown"""
+    try:
+        get_db()
+        import src.model_recommendation  # noqa: F401
+    except Exception as e:
+        print(f"Portal warm-up failed: {e}")
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """Start the warm-up once per process; reruns reuse the same thread"""
+    thread = threading.Thread(target=_warm_up, name='portal-warm-up', daemon=True)
+    thread.start()
+    return thread
 
 def init_session_state():
     if 'logged_in' not in st.session_state:
@@ -25,6 +43,8 @@ def init_session_state():
         st.session_state.current_page = 'Driver Dashboard'
 
 def show_driver_dashboard(driver_details):
+    from src.model_recommendation import show_driving_patterns
+    
     st.title("Driver Dashboard")
     
     driver = driver_details["driver"]
@@ -57,9 +77,9 @@ def show_driver_dashboard(driver_details):
             st.write(f"Previous Accidents: {info['previous_accidents']}")
             st.write(f"Traffic Fines: {info['traffic_fines']}")
     
-    # Show driving patterns visualization
+    # Show driving patterns visualization, built once per driver per data refresh
     st.header("Your Driving Pattern")
-    show_driving_patterns(info)
+    show_driving_patterns(info, (driver.driver_id, driver_details.get("data_version")))
     
     # Current UIB Model Status
     st.header("Current UIB Model Status")
@@ -99,7 +119,7 @@ def show_dashboard():
         st.session_state.driver_id = None
         st.rerun()
     
-    driver_details = db.get_driver_details(st.session_state.driver_id)
+    driver_details = get_db().get_driver_details(st.session_state.driver_id)
     if not driver_details["success"]:
         st.error("Error loading driver details")
         return
@@ -107,6 +127,7 @@ def show_dashboard():
     if st.session_state.current_page == 'Driver Dashboard':
         show_driver_dashboard(driver_details)
     else:
+        from src.model_recommendation import show_recommendations
         show_recommendations(driver_details)
 
 def login_page():
@@ -114,6 +135,7 @@ def login_page():
     
     # Initialize session state
     init_session_state()
+    start_warm_up()
     
     if st.session_state.logged_in:
         show_dashboard()
@@ -129,7 +151,7 @@ def login_page():
         
         if st.button("Login"):
             if license_number and password:
-                result = db.authenticate_driver(license_number, password)
+                result = get_db().authenticate_driver(license_number, password)
                 if result["success"]:
                     st.session_state.logged_in = True
                     st.session_state.driver_id = result["driver"].driver_id
@@ -156,7 +178,7 @@ def login_page():
                     st.error("Passwords do not match!")
                     return
                 
-                result = db.register_driver(license_plate, reg_license_number, password)
+                result = get_db().register_driver(license_plate, reg_license_number, password)
                 if result["success"]:
                     st.success(f"Registration successful! Your Driver ID is: {result['driver_id']}")
                     st.info("Please use your license number and password to login.")
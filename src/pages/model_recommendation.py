@@ -6,65 +6,10 @@ from pathlib import Path
 import sys
 
 # Add the project root directory to Python path
-project_root = Path(__file__).parent.parent
+project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
-def calculate_risk_score(driver_info):
-    """Calculate a risk score based on driving behavior"""
-    # Normalize and weight different factors
-    weights = {
-        'sudden_braking_events': 0.25,
-        'speeding_events': 0.25,
-        'previous_accidents': 0.3,
-        'traffic_fines': 0.2
-    }
-    
-    max_values = {
-        'sudden_braking_events': 100,
-        'speeding_events': 100,
-        'previous_accidents': 3,
-        'traffic_fines': 3
-    }
-    
-    score = 0
-    for factor, weight in weights.items():
-        if pd.notna(driver_info[factor]):
-            normalized_value = min(driver_info[factor] / max_values[factor], 1)
-            score += normalized_value * weight
-    
-    return score
-
-def get_model_recommendation(risk_score, total_km, driving_style):
-    """Get model recommendation based on risk score and driving patterns"""
-    if risk_score < 0.3:
-        base_recommendation = "Premium"
-        features = [
-            "Highest coverage for safe drivers",
-            "Rewards for consistent safe driving",
-            "Personal accident cover up to ₹15 lakhs",
-            "Zero depreciation cover",
-            "24/7 roadside assistance"
-        ]
-    elif risk_score < 0.6:
-        base_recommendation = "Standard"
-        features = [
-            "Balanced coverage for average risk drivers",
-            "Personal accident cover up to ₹10 lakhs",
-            "Basic roadside assistance",
-            "Partial zero depreciation cover",
-            "Optional add-ons available"
-        ]
-    else:
-        base_recommendation = "Basic"
-        features = [
-            "Essential coverage for high-risk drivers",
-            "Personal accident cover up to ₹5 lakhs",
-            "Basic third-party liability",
-            "Optional roadside assistance",
-            "Mandatory coverage features"
-        ]
-    
-    return base_recommendation, features
+from src.functionalities.scoring import COVERAGE_PLANS, calculate_risk_score, get_model_recommendation
 
 def show_model_comparison(driver_risk_score):
     """Show interactive model comparison"""
@@ -178,7 +123,8 @@ def show_recommendations(driver_details):
     risk_score = calculate_risk_score(info)
     
     # Get model recommendation
-    recommended_model, features = get_model_recommendation(risk_score, info['total_km'], info['driving_style'])
+    recommended_model, features = get_model_recommendation(risk_score, info['total_km'], info['driving_style'],
+                                                           plans=COVERAGE_PLANS)
     
     col1, col2 = st.columns(2)
     
@@ -220,12 +166,12 @@ def show_recommendations(driver_details):
     
     if st.button("Confirm Model Selection"):
         # Update the model in the database
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
+        from database.db_manager import get_db_manager
+        db = get_db_manager()
         result = db.update_uib_model(driver.driver_id, selected_model)
         
         if result["success"]:
             st.success(f"Successfully enrolled in the {selected_model} model!")
             st.info("You will be locked into this model for 12 months")
         else:
-            st.error("Failed to update model. Please try again.") 
\ No newline at end of file
+            st.error(f"Failed to update model: {result['error']}") 
\ No newline at end of file
@@ -0,0 +1,3 @@
+# Pipeline stage names in run order. Kept free of imports, so the admin page can
+# offer the stages without loading the pipeline and its ML dependencies.
+STAGES = ['generate', 'validate', 'features', 'risk', 'ml', 'premiums', 'similar', 'publish']
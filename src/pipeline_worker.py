@@ -0,0 +1,98 @@
+import argparse
+import io
+import json
+import sys
+import threading
+import time
+from contextlib import redirect_stderr
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from database.db_manager import create_portal_engine
+from database.job_queue import JobQueue, options_to_argv
+from src.main import parse_args, run_pipeline
+
+class JobCancelled(Exception):
+    pass
+
+def _heartbeat(queue, job_id, stop, interval):
+    """Keep a running job's timestamp fresh while a long stage runs"""
+    while not stop.wait(interval):
+        queue.heartbeat(job_id)
+
+def parse_job_options(options):
+    """Parse stored job options with the pipeline's own argument parser"""
+    errors = io.StringIO()
+    try:
+        with redirect_stderr(errors):
+            return parse_args(options_to_argv(options))
+    except SystemExit:
+        lines = errors.getvalue().strip().splitlines()
+        message = lines[-1].split('error: ', 1)[-1] if lines else "invalid options"
+        raise ValueError(f"Invalid pipeline options: {message}")
+
+def run_job(queue, job, heartbeat_interval=30, db_url=None):
+    """Run one claimed job, recording progress and honouring cancellation between stages"""
+    options = json.loads(job.options)
+    print(f"Running job {job.id}: {' '.join(options_to_argv(options)) or '(defaults)'}")
+
+    def on_stage(stage, completed, total):
+        if queue.update_progress(job.id, completed / total, stage=stage, message=f"Running {stage}"):
+            raise JobCancelled()
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(queue, job.id, stop, heartbeat_interval), daemon=True)
+    heartbeat.start()
+    try:
+        args = parse_job_options(options)
+        if db_url is not None:
+            # Publish scores to the database this worker serves
+            args.db_url = db_url
+        run_pipeline(args, on_stage=on_stage)
+        queue.finish(job.id, 'succeeded', message="Pipeline completed")
+        print(f"Job {job.id} succeeded")
+    except JobCancelled:
+        queue.finish(job.id, 'cancelled', message="Cancelled by request")
+        print(f"Job {job.id} cancelled")
+    except Exception as e:
+        queue.finish(job.id, 'failed', message=str(e))
+        print(f"Job {job.id} failed: {e}")
+    finally:
+        stop.set()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued pipeline jobs.")
+    parser.add_argument('--db-url', default='sqlite:///driver_portal.db',
+                        help="Portal database holding the job queue")
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help="Seconds to wait between checks for new jobs")
+    parser.add_argument('--stale-minutes', type=int, default=60,
+                        help="Fail running jobs with no heartbeat for this long")
+    parser.add_argument('--once', action='store_true',
+                        help="Process the pending jobs and exit instead of polling")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(create_portal_engine(args.db_url))
+    print("Pipeline worker started")
+
+    while True:
+        stale = queue.fail_stale(args.stale_minutes)
+        if stale:
+            print(f"Marked {stale} stale job(s) as failed")
+
+        job = queue.claim_next()
+        if job is not None:
+            run_job(queue, job, db_url=args.db_url)
+            continue
+        if args.once:
+            return 0
+        time.sleep(args.poll_interval)
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("Pipeline worker stopped")
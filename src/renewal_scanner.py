@@ -0,0 +1,43 @@
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from database.db_manager import DEFAULT_DB_URL, create_portal_engine, ensure_schema
+from database.renewals import RENEWAL_BATCH_SIZE, RENEWAL_COLUMNS, iter_renewal_candidates
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List drivers whose UIB model lock is about to expire.")
+    parser.add_argument('--db-url', default=DEFAULT_DB_URL,
+                        help="Portal database to scan")
+    parser.add_argument('--days', type=int, default=30,
+                        help="Report locks expiring within this many days (default: 30)")
+    parser.add_argument('--output', default='renewal_candidates.csv',
+                        help="CSV file to write the candidates to")
+    parser.add_argument('--batch-size', type=int, default=RENEWAL_BATCH_SIZE,
+                        help="Drivers fetched per page")
+    args = parser.parse_args(argv)
+
+    engine = create_portal_engine(args.db_url)
+    ensure_schema(engine)
+
+    count = switches = 0
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RENEWAL_COLUMNS)
+        writer.writeheader()
+        for candidate in iter_renewal_candidates(engine, args.days, batch_size=args.batch_size):
+            writer.writerow(candidate)
+            count += 1
+            switches += candidate['switch_recommended']
+    engine.dispose()
+
+    print(f"{count} locks expire within {args.days} days; a different model is recommended for {switches}")
+    print(f"Renewal candidates saved to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
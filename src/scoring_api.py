@@ -0,0 +1,362 @@
+import argparse
+import json
+import math
+import os
+import signal
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from database.db_manager import DEFAULT_DB_URL, DatabaseManager
+from src.functionalities.schema import DRIVING_STYLES, VEHICLE_TYPES
+from src.functionalities.scoring import DISTANCE_BRACKETS, MODEL_FEATURES, UIB_MODELS, score_drivers
+from src.lru_cache import LRUCache
+
+RESPONSE_CACHE_SIZE = 100000
+VERSION_CHECK_INTERVAL = 1.0  # Seconds a data version is trusted before it is read again
+MAX_BATCH_SIZE = 1000
+MAX_BODY_BYTES = 4 * 1024 * 1024
+MAX_DRIVER_ID = 2 ** 63 - 1  # Largest SQLite INTEGER
+
+# Fields a quote request must provide for each driver; telemetry counts may be missing
+QUOTE_FIELDS = ['vehicle_type', 'driving_style', 'total_km', 'age', 'years_of_experience',
+                'previous_accidents', 'traffic_fines']
+TELEMETRY_FIELDS = ['sudden_braking_events', 'speeding_events']
+# Driver data fields the scoring engine reads
+SCORED_FIELDS = QUOTE_FIELDS + TELEMETRY_FIELDS
+RISK_COMPONENTS = ['braking_risk', 'speeding_risk', 'accident_risk', 'fine_risk', 'total_risk_score']
+BRACKET_DESCRIPTIONS = [info['description'] for info in DISTANCE_BRACKETS.values()]
+PUBLISHED_FIELDS = ['risk_category', 'comprehensive_risk_score', 'recommended_premium_model']
+
+def score_records(records, published=None):
+    """
+    Risk score, UIB recommendation, cost-benefit estimates and premiums of driver
+    records (dicts of driver data fields), scored in one scoring-engine call.
+    published holds each driver's pipeline scores, or None where not scored yet.
+    """
+    fields = SCORED_FIELDS + [field for field in ['behavior_risk_score'] if all(field in record for record in records)]
+    scored = score_drivers({field: [record[field] for record in records] for field in fields})
+    columns = {name: values.tolist() for name, values in scored.items() if name != 'premiums'}
+    premiums = {name: values.tolist() for name, values in scored['premiums'].items()}
+
+    results = []
+    for i in range(len(records)):
+        model = columns['recommended_uib_model'][i]
+        result = {
+            'risk_score': columns['risk_score'][i],
+            'recommended_uib_model': model,
+            'model_features': MODEL_FEATURES[model],
+            'cost_benefit': {
+                name: {'monthly_premium': columns['monthly_premiums'][i][j],
+                       'monthly_savings': columns['monthly_savings'][i][j]}
+                for j, name in enumerate(UIB_MODELS)
+            },
+            'premiums': {
+                'base_premium': premiums['base_premium'][i],
+                'distance_info': {
+                    'monthly_km': premiums['monthly_km'][i],
+                    'bracket_description': BRACKET_DESCRIPTIONS[premiums['distance_bracket'][i]],
+                    'distance_factor': premiums['distance_factor'][i]
+                },
+                'risk_scores': {component: premiums[component][i] for component in RISK_COMPONENTS},
+                **{field: premiums[field][i] for field in ['behavior_weight', 'payd_premium', 'phyd_premium']}
+            }
+        }
+        if published is not None and published[i] is not None:
+            # The pipeline's published assessment, when the driver has been scored
+            result.update({field: published[i][field] for field in PUBLISHED_FIELDS})
+        results.append(_plain(result))
+    return results
+
+def _plain(value):
+    """JSON-ready copy of a result: NumPy scalars as Python numbers and NaN as null"""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def _quote_input(record):
+    """Driver record of a quote request in the shape the scoring functions expect, or an error message"""
+    if not isinstance(record, dict):
+        return None, "Each driver must be a JSON object"
+    missing = [field for field in QUOTE_FIELDS if record.get(field) is None]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+    if record['vehicle_type'] not in VEHICLE_TYPES:
+        return None, f"vehicle_type must be one of {', '.join(VEHICLE_TYPES)}"
+    if record['driving_style'] not in DRIVING_STYLES:
+        return None, f"driving_style must be one of {', '.join(DRIVING_STYLES)}"
+
+    info = {'vehicle_type': record['vehicle_type'], 'driving_style': record['driving_style']}
+    for field in QUOTE_FIELDS[2:] + TELEMETRY_FIELDS:
+        value = record.get(field)
+        if value is None and field in TELEMETRY_FIELDS:
+            info[field] = float('nan')
+            continue
+        try:
+            info[field] = float(value)
+        except (TypeError, ValueError):
+            return None, f"{field} must be a number"
+        if not math.isfinite(info[field]) or info[field] < 0:
+            return None, f"{field} must be a non-negative number"
+    return info, None
+
+class ScoringService:
+    """Scores drivers from the shared database, caching results per driver and data version"""
+
+    def __init__(self, db, cache_size=RESPONSE_CACHE_SIZE):
+        self.db = db
+        self.cache = LRUCache(cache_size)
+        self._version = None
+        self._version_expires = 0.0
+
+    def data_version(self):
+        """Current data version, read from the database at most once per VERSION_CHECK_INTERVAL"""
+        now = time.monotonic()
+        if now >= self._version_expires:
+            self._version = self.db.scoring_data_version()
+            self._version_expires = now + VERSION_CHECK_INTERVAL
+        return self._version
+
+    def driver_scores(self, driver_ids):
+        """Scores of drivers in the data file, in request order; cache misses are fetched in one batch"""
+        version = self.data_version()
+        results = {}
+        missing = []
+        for driver_id in driver_ids:
+            cached = self.cache.get((driver_id, version))
+            if cached is not None:
+                results[driver_id] = cached
+            else:
+                missing.append(driver_id)
+
+        if missing:
+            lookup = self.db.get_driver_profiles(missing)
+            if not lookup['success']:
+                raise RuntimeError(lookup['error'])
+            profiles = lookup['profiles']
+            if profiles:
+                found = list(profiles)
+                scored = score_records([profiles[driver_id]['additional_info'] for driver_id in found],
+                                       [profiles[driver_id]['scores'] for driver_id in found])
+                for driver_id, result in zip(found, scored):
+                    result = {'driver_id': driver_id, **result}
+                    self.cache.put((driver_id, version), result)
+                    results[driver_id] = result
+
+        return [results.get(driver_id, {'driver_id': driver_id, 'error': "Driver not found"})
+                for driver_id in driver_ids]
+
+    def quotes(self, records):
+        """Scores of drivers described in the request, cached by their inputs; misses are scored in one batch"""
+        results = [None] * len(records)
+        misses = {}
+        for i, record in enumerate(records):
+            info, error = _quote_input(record)
+            if error is not None:
+                results[i] = {'error': error}
+                continue
+            # NaN never compares equal, so missing telemetry is keyed as None
+            key = ('quote',) + tuple(None if value != value else value for value in info.values())
+            results[i] = self.cache.get(key)
+            if results[i] is None:
+                misses.setdefault(key, (info, []))[1].append(i)
+
+        if misses:
+            scored = score_records([info for info, _ in misses.values()])
+            for (key, (_, positions)), result in zip(misses.items(), scored):
+                self.cache.put(key, result)
+                for i in positions:
+                    results[i] = result
+
+        return [{**result, 'driver_id': record.get('driver_id') if isinstance(record, dict) else None}
+                for record, result in zip(records, results)]
+
+    def health(self):
+        return {
+            'success': True,
+            'data_version': self.data_version(),
+            'cache': {'entries': len(self.cache), 'hits': self.cache.hits, 'misses': self.cache.misses}
+        }
+
+    def close(self):
+        self.db.close()
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _driver_id(value):
+    # bool is an int subclass, and floats would be truncated to another driver
+    if type(value) is not int or not 1 <= value <= MAX_DRIVER_ID:
+        raise ApiError(400, "Driver IDs must be positive integers")
+    return value
+
+def _path_driver_id(segment):
+    if not (segment.isascii() and segment.isdigit()) or len(segment) > len(str(MAX_DRIVER_ID)):
+        raise ApiError(400, "Driver IDs must be positive integers")
+    return _driver_id(int(segment))
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints:
+
+        GET  /health                 data version and cache statistics
+        GET  /drivers/<driver_id>    scores of one driver in the data file
+        POST /drivers/scores         {"driver_ids": [...]} scored in one batch
+        POST /quotes                 {"drivers": [{...}, ...]} scored from the submitted records
+    """
+    # HTTP/1.1 keeps connections open between requests
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this Nagle's algorithm delays the body
+    disable_nagle_algorithm = True
+    server_version = 'DriverScoringAPI/1.0'
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def _get(self, path):
+        service = self.server.service
+        if path == '/health':
+            return service.health()
+        parts = path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'drivers':
+            result = service.driver_scores([_path_driver_id(parts[1])])[0]
+            if 'error' in result:
+                raise ApiError(404, result['error'])
+            return {'success': True, 'driver': result}
+        raise ApiError(404, f"No such endpoint: GET {path}")
+
+    def _post(self, path):
+        service = self.server.service
+        body = self._json_body()
+        if path == '/drivers/scores':
+            driver_ids = [_driver_id(value) for value in self._batch(body, 'driver_ids')]
+            return {'success': True, 'results': service.driver_scores(driver_ids)}
+        if path == '/quotes':
+            return {'success': True, 'results': service.quotes(self._batch(body, 'drivers'))}
+        raise ApiError(404, f"No such endpoint: POST {path}")
+
+    def _json_body(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Where the body ends is unknown, so nothing more can be read from this connection
+            self.close_connection = True
+            raise ApiError(400, "Content-Length must be a non-negative integer")
+        if length > MAX_BODY_BYTES:
+            # The unread body would be parsed as the next request, so the connection is dropped
+            self.close_connection = True
+            raise ApiError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes")
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON")
+
+    @staticmethod
+    def _batch(body, field):
+        items = body.get(field) if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            raise ApiError(400, f"Request body must have a '{field}' list")
+        if len(items) > MAX_BATCH_SIZE:
+            raise ApiError(413, f"Batches are limited to {MAX_BATCH_SIZE} items")
+        return items
+
+    def _handle(self, route):
+        try:
+            status, body = 200, route(urlsplit(self.path).path)
+        except ApiError as e:
+            status, body = e.status, {'success': False, 'error': str(e)}
+        except Exception as e:
+            status, body = 500, {'success': False, 'error': str(e)}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Per-request logging to stderr costs more than a cached response
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ScoringServer(ThreadingHTTPServer):
+    # Room for bursts of new connections from many clients
+    request_queue_size = 1024
+
+    def __init__(self, address, verbose=False):
+        super().__init__(address, ScoringRequestHandler)
+        self.verbose = verbose
+        self.service = None
+
+def serve(server, db_url, workers=1):
+    """
+    Serve on server's socket from workers processes.
+
+    Each worker is a forked process with its own database connections and cache,
+    all accepting from the one listening socket, so throughput scales past the GIL.
+    """
+    children = []
+    for _ in range(workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            children = []
+            break
+        children.append(pid)
+    if children:
+        # Stopping the first process stops the workers it forked
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Reloads of the data file are left to the portal, so workers only read
+    server.service = ScoringService(DatabaseManager(db_url, reload_interval=None))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        server.server_close()
+        server.service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve driver risk scores, UIB recommendations and premiums as JSON.")
+    parser.add_argument('--db-url', default=DEFAULT_DB_URL,
+                        help="Portal database to serve drivers from")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=8600, help="Port to listen on")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes accepting requests (default: 1)")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+
+    # Create the schema and load the driver data once, before any worker starts
+    DatabaseManager(args.db_url, reload_interval=None).close()
+
+    server = ScoringServer((args.host, args.port), verbose=args.verbose)
+    print(f"Scoring API listening on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    serve(server, args.db_url, max(1, args.workers))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())